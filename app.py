@@ -1,9 +1,20 @@
 import os
-import glob
-import pandas as pd
 import dash
 from dash import html
-from flask import Flask, send_from_directory
+from flask import Flask, send_from_directory, request, jsonify
+from ml.radar_query import GroupRadarQuery
+from ml.student_index import StudentIndex
+from ml.partitions import PartitionedDataset
+from ml.sketches import StreamingStats, DEFAULT_QUANTILES
+from ml.dataset import data_version, data_updated_at, submit_record_paths
+from ml.chart_export import CHART_STAGES
+from ml.registry import available_charts, render_chart
+from ml.assets import prepare_local_assets, precompress_outputs
+from ml.profiling import tracer, trace_span
+from ml.reloadable import Reloadable
+from service.charts import init_charts, payload_store
+from service.cache import init_cache, response_cache
+from service.metrics import init_metrics
 
 # 获取当前项目根目录
 project_root = os.path.dirname(os.path.abspath(__file__))
@@ -13,13 +24,52 @@ result_dir = os.path.join(project_root, "results")
 # 初始化 Flask 应用
 server = Flask(__name__, static_folder=os.path.join(project_root, 'frontend', 'public'), template_folder=os.path.join(project_root, 'frontend', 'public'))
 
+# 图表数据接口（/api/charts）与图表页面（/charts/<文件名>）
+init_charts(server, result_dir)
+
+# 查询接口的响应缓存，数据版本变化时整体失效
+init_cache(server, version_func=lambda: data_version(data_dir))
+
+# 流程各阶段耗时追踪文件（Chrome Trace Event 格式，可用 Perfetto 打开）
+PIPELINE_TRACE_FILE = "pipeline_trace.json"
+
+def response_cache_stats():
+    stats = response_cache.stats()
+    return stats["hits"], stats["misses"], stats["entries"]
+
+def radar_query_cache_stats():
+    info = radar_query.cache_info()
+    return info.hits, info.misses, info.currsize
+
+# 运行指标（/metrics）：请求延迟、响应大小、内存、数据新鲜度、流程耗时与缓存命中率
+init_metrics(
+    server,
+    data_info=lambda: (data_updated_at(data_dir), student_index.meta["rows"] if student_index.meta else None),
+    trace_path=os.path.join(result_dir, PIPELINE_TRACE_FILE),
+    chart_stages=CHART_STAGES,
+    caches={"response": response_cache_stats, "radar_query": radar_query_cache_stats},
+)
+
+def generate_visualizations(charts=None):
+    """生成图表（默认全部），并导出各阶段的耗时、内存与行数追踪"""
+    tracer.reset()
+    with trace_span("generate_visualizations"):
+        build_visualizations(charts)
+    # 只生成部分图表时保留其余图表上一次的阶段，/metrics 不会因此丢失它们的耗时
+    trace_path = tracer.write_trace(os.path.join(result_dir, PIPELINE_TRACE_FILE), keep_previous=charts is not None)
+    print(tracer.format_summary())
+    print(f"流程追踪已保存到 {trace_path}")
+    profile_path = tracer.write_profile()
+    if profile_path:
+        print(f"采样分析结果已保存到 {profile_path}")
+
 # 生成可视化文件
-def generate_visualizations():
-    # 加载数据
+def build_visualizations(charts=None):
+    """生成指定图表（默认全部），各可视化模块由注册表按需导入"""
     student_info_path = os.path.join(data_dir, 'Data_StudentInfo.csv')
     title_info_path = os.path.join(data_dir, 'Data_TitleInfo.csv')
-    submitrecord_paths = glob.glob(os.path.join(data_dir, "SubmitRecord-Class*.csv"))
-    
+    submitrecord_paths = submit_record_paths(data_dir)
+
     # 检查文件是否存在
     if not os.path.exists(student_info_path):
         raise FileNotFoundError(f"文件 {student_info_path} 不存在，请检查路径。")
@@ -32,65 +82,20 @@ def generate_visualizations():
     print(f"题目信息文件路径: {title_info_path}")
     print(f"提交记录文件路径: {submitrecord_paths}")
 
-    student_df = pd.read_csv(student_info_path)
-    title_df = pd.read_csv(title_info_path)
-    submit_df_list = []
-    for path in submitrecord_paths:
-        if os.path.exists(path):
-            print(f"加载文件: {path}")
-            temp_df = pd.read_csv(path)
-            if temp_df.empty:
-                print(f"警告：文件 {path} 为空，跳过。")
-            else:
-                submit_df_list.append(temp_df)
-        else:
-            print(f"警告：文件 {path} 不存在，跳过。")
-    submit_df = pd.concat(submit_df_list, ignore_index=True)
-    
-    # 检查提交记录数据是否为空
-    if submit_df.empty:
-        raise ValueError("提交记录数据为空，请检查文件路径和内容。")
-    
-    # 1. 知识点热力图
-    from ml.knowledge_heatmap import DataVisualizer
-    visualizer = DataVisualizer(student_df, title_df, submit_df, data_dir)
-    output_path = os.path.join(result_dir, "knowledge_heatmap.html")
-    visualizer.visualize(output_path=output_path)
-    
-    # 检查文件是否生成
-    if not os.path.exists(output_path):
-        raise FileNotFoundError(f"文件 {output_path} 未生成，请检查代码逻辑。")
-    print(f"热力图已成功生成并保存到 {output_path}")
-
-    # 2. 雷达图
-    from ml.radar_chart import ClassRadarVisualizer
-    radar_visualizer = ClassRadarVisualizer(data_dir)
-    radar_output_path = os.path.join(result_dir, "class_radar_5dims_normalized.html")
-    radar_visualizer.visualize(output_path=radar_output_path)
-    
-    # 3. 3D 散点图
-    from ml._3d_scatter import StudentBehaviorClusterVisualizer
-    cluster_visualizer = StudentBehaviorClusterVisualizer(data_dir)
-    cluster_output_path = os.path.join(result_dir, "student_behavior_3d_clusters.html")
-    cluster_visualizer.visualize(output_path=cluster_output_path)
-    
-    # 4. XGBoost 模型可视化
-    from ml.Xgboost import XGBoostModelVisualizer
-    xgboost_visualizer = XGBoostModelVisualizer(data_dir)
-    xgboost_output_path = os.path.join(result_dir, "xgb_model_visualization.html")
-    xgboost_visualizer.visualize(output_path=xgboost_output_path)
-    
-    # 5. 网络图
-    from ml.network import NetworkGraphVisualizer
-    network_visualizer = NetworkGraphVisualizer(data_dir)
-    network_output_path = os.path.join(result_dir, "network_graph.html")
-    network_visualizer.visualize(output_path=network_output_path)
+    # 图表 JSON 数据按数据版本标记，供前端长期缓存
+    os.makedirs(result_dir, exist_ok=True)
+    version = data_version(data_dir)
 
-    # 6. 生成时间线图表 
-    from ml.timeline import TimelineVisualizer
-    timeline_visualizer = TimelineVisualizer(data_dir)
-    timeline_output_path = os.path.join(result_dir, "all_classes_timeline_tab.html")
-    timeline_visualizer.visualize(output_path=timeline_output_path)
+    # 所有页面引用同一份本地运行时；ECharts 运行时无法准备时终止生成
+    prepare_local_assets(result_dir)
+
+    # 依次生成热力图、雷达图、3D 散点图、XGBoost 模型、网络图与时间线
+    for name in charts or available_charts():
+        output_path = render_chart(name, data_dir, result_dir, version)
+        print(f"图表 {name} 已成功生成并保存到 {output_path}")
+
+    # 为所有输出写出 .gz/.br 压缩副本，由服务端直接发送
+    print(f"已生成 {precompress_outputs(result_dir)} 个压缩副本")
 
 # 初始化 Dash 应用
 dash_app = dash.Dash(
@@ -99,10 +104,9 @@ dash_app = dash.Dash(
     url_base_pathname='/dash/'
 )
 
-# 设置 Dash 布局
 # 设置 Dash 布局
 def setup_dash_layout():
-    # 确保文件已生成
+    # 确保文件已生成；图表页面通过 /charts/ 地址加载，不再内联进布局
     required_files = [
         "knowledge_heatmap.html",
         "class_radar_5dims_normalized.html",
@@ -123,17 +127,17 @@ def setup_dash_layout():
         html.Div([
             # 图表 1：知识点热力图
             html.Div([
-                html.Iframe(srcDoc=open(os.path.join(data_dir, "knowledge_heatmap.html"), "r", encoding="utf-8").read(), width="100%", height="400px")
+                html.Iframe(src="/charts/knowledge_heatmap.html", width="100%", height="400px")
             ], style={'flex': '1', 'margin': '10px'}),
             
             # 图表 2：雷达图
             html.Div([
-                html.Iframe(srcDoc=open(os.path.join(data_dir, "class_radar_5dims_normalized.html"), "r", encoding="utf-8").read(), width="100%", height="400px")
+                html.Iframe(src="/charts/class_radar_5dims_normalized.html", width="100%", height="400px")
             ], style={'flex': '1', 'margin': '10px'}),
             
             # 图表 3：3D 散点图
             html.Div([
-                html.Iframe(srcDoc=open(os.path.join(data_dir, "student_behavior_3d_clusters.html"), "r", encoding="utf-8").read(), width="100%", height="400px")
+                html.Iframe(src="/charts/student_behavior_3d_clusters.html", width="100%", height="400px")
             ], style={'flex': '1', 'margin': '10px'})
         ], style={'display': 'flex', 'justifyContent': 'space-between', 'marginBottom': '20px'}),
         
@@ -141,17 +145,17 @@ def setup_dash_layout():
         html.Div([
             # 图表 4：XGBoost 模型可视化
             html.Div([
-                html.Iframe(srcDoc=open(os.path.join(data_dir, "xgb_model_visualization.html"), "r", encoding="utf-8").read(), width="100%", height="400px")
+                html.Iframe(src="/charts/xgb_model_visualization.html", width="100%", height="400px")
             ], style={'flex': '1', 'margin': '10px'}),
             
             # 图表 5：网络图
             html.Div([
-                html.Iframe(srcDoc=open(os.path.join(data_dir, "network_graph.html"), "r", encoding="utf-8").read(), width="100%", height="400px")
+                html.Iframe(src="/charts/network_graph.html", width="100%", height="400px")
             ], style={'flex': '1', 'margin': '10px'}),
             
             # 图表 6：时间线标签图
             html.Div([
-                html.Iframe(srcDoc=open(os.path.join(data_dir, "all_classes_timeline_tab.html"), "r", encoding="utf-8").read(), width="100%", height="400px")
+                html.Iframe(src="/charts/all_classes_timeline_tab.html", width="100%", height="400px")
             ], style={'flex': '1', 'margin': '10px'})
         ], style={'display': 'flex', 'justifyContent': 'space-between'})
     ])
@@ -160,8 +164,113 @@ def setup_dash_layout():
 def serve_vue():
     return send_from_directory(os.path.join(project_root, 'frontend', 'public'), 'index.html')
 
-# 运行 Flask 应用
+# 按班级和时间段分区的提交记录，按时间范围或班级的查询只读取命中的分区
+partitions = PartitionedDataset(data_dir)
+
+# 任意分组雷达图查询（首次请求时预计算分组汇总）
+radar_query = GroupRadarQuery(data_dir, partitions=partitions)
+
+@server.route('/api/radar', methods=['GET', 'POST'])
+@response_cache.cached
+def radar_api():
+    """GET: ?group_by=major&groups=J23517,J40192&start=2024-01-01&end=2024-01-08
+    POST: {"group_by": "students", "groups": {"A组": [student_ID, ...], ...}, "start": ..., "end": ...}"""
+    if request.method == 'POST':
+        payload = request.get_json(silent=True)
+        if not isinstance(payload, dict):
+            return jsonify({"error": "请求体必须为 JSON 对象"}), 400
+        group_by = payload.get('group_by', 'class')
+        groups = payload.get('groups')
+        start, end = payload.get('start'), payload.get('end')
+    else:
+        group_by = request.args.get('group_by', 'class')
+        groups = [g for g in request.args.get('groups', '').split(',') if g] or None
+        start, end = request.args.get('start'), request.args.get('end')
+    try:
+        return jsonify(radar_query.compare(group_by, groups, start=start, end=end))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+@server.route('/api/timeline')
+@response_cache.cached
+def timeline_api():
+    """各班级每日提交量：?classes=Class1,Class2&start=2024-01-01&end=2024-01-08，只读取命中的分区"""
+    classes = [c for c in request.args.get('classes', '').split(',') if c] or None
+    start, end = request.args.get('start'), request.args.get('end')
+    # 整个请求只使用同一份分区视图，期间的重建不会影响它
+    view = partitions.current()
+    try:
+        scanned = view.prune(classes=classes, start=start, end=end)
+        submit_df = view.read(["class", "time"], classes=classes, start=start, end=end)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    # 按需导入：时间线模块依赖 pyecharts，服务启动时不加载
+    from ml.timeline import TimelineVisualizer
+    visualizer = TimelineVisualizer(data_dir, classes=classes, start=start, end=end, submit_df=submit_df)
+    visualizer.preprocess_data()
+    counts = visualizer.daily_counts()
+    return jsonify({
+        "dates": sorted(counts['date'].unique().tolist()),
+        "series": [
+            {"class": name, "data": dict(zip(group['date'], group['count'].astype(int).tolist()))}
+            for name, group in counts.groupby('class')
+        ],
+        "rows": int(len(visualizer.submit_df)),
+        "partitions_scanned": len(scanned),
+        "partitions_total": len(view.manifest["partitions"]),
+    })
+
+# 按班级、题目和日期的去重学生数与答题时长/内存分位数 sketch（由分区数据逐班级累加）
+streaming_stats = Reloadable(lambda: StreamingStats().build(partitions))
+
+def get_streaming_stats():
+    return streaming_stats.get()
+
+@server.route('/api/stats/<dimension>')
+@response_cache.cached
+def stats_api(dimension):
+    """近似统计：/api/stats/class?keys=Class1,Class2&quantiles=0.5,0.95,0.99
+    返回各取值及其合并后的提交数、去重学生数与 timeconsume / memory 分位数"""
+    keys = [k for k in request.args.get('keys', '').split(',') if k] or None
+    try:
+        quantiles = [float(q) for q in request.args.get('quantiles', '').split(',') if q] or DEFAULT_QUANTILES
+        if any(not 0 <= q <= 1 for q in quantiles):
+            raise ValueError("quantiles 需在 0 到 1 之间")
+        return jsonify(get_streaming_stats().summary(dimension, keys, quantiles))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+# 学生明细索引（首次请求时打开，数据版本变化时重建）
+student_index = StudentIndex(data_dir)
+
+@server.route('/api/students/<student_id>')
+@response_cache.cached
+def student_api(student_id):
+    """返回单个学生的提交历史、各知识点得分和所属聚类"""
+    detail = student_index.student_detail(student_id)
+    if detail is None:
+        return jsonify({"error": f"学生 {student_id} 不存在"}), 404
+    return jsonify(detail)
+
+@response_cache.on_invalidate
+def reset_query_data():
+    """数据重建后标记预计算结果过期，下次查询时在锁内按新数据重建并整体替换，进行中的查询继续使用旧结果"""
+    radar_query.invalidate()
+    student_index.mark_stale()
+    partitions.mark_stale()
+    streaming_stats.mark_stale()
+
+def warm_up():
+    """预先加载查询所需的数据，生产模式下在 fork 工作进程之前调用，使各进程以写时复制方式共享"""
+    payload_store.load(result_dir)
+    radar_query.build()
+    student_index.open_or_build()
+    partitions.open_or_build()
+    get_streaming_stats()
+
+# 运行 Flask 应用（开发模式；生产环境请使用 serve.py）
 if __name__ == '__main__':
     generate_visualizations()
     setup_dash_layout()
+    warm_up()
     server.run(debug=True)
\ No newline at end of file
@@ -2,4 +2,12 @@ const { defineConfig } = require('@vue/cli-service');
 module.exports = defineConfig({
     transpileDependencies: true,
     publicPath: '/', // 确保路径正确
+    devServer: {
+        // 开发时将图表数据请求转发到 Flask 服务
+        proxy: {
+            '/api': { target: 'http://127.0.0.1:5000' },
+            '/charts': { target: 'http://127.0.0.1:5000' },
+            '/assets': { target: 'http://127.0.0.1:5000' }
+        }
+    }
 });
\ No newline at end of file
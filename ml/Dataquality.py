@@ -1,7 +1,19 @@
-import pandas as pd
 import os
+import sys
+import json
+import time
+import argparse
+from datetime import datetime
+import numpy as np
+import pandas as pd
+from .profiling import trace_stage
 
 class DataQualityChecker:
+    # 提交记录应包含的列，以及需按数值比较的列
+    SUBMIT_COLUMNS = ["index", "class", "time", "state", "score", "title_ID", "method", "memory", "timeconsume", "student_ID"]
+    NUMERIC_COLUMNS = ["time", "score", "memory", "timeconsume"]
+    MAJOR_PATTERN = r'^J\d{5}$'
+
     def __init__(self, data_dir):
         self.data_dir = data_dir
         self.student_info = None
@@ -44,3 +56,193 @@ class DataQualityChecker:
         self.load_title_info()
         self.load_submit_records()
         self.check_missing_values()
+
+    @trace_stage()
+    def validate(self, report_path=None, chunksize=200000, max_examples=5):
+        """单次流式扫描所有提交记录，完成全部校验并生成机器可读的报告
+
+        每个文件按块读取且只读一次，所有校验都以向量化方式在块上完成：
+        列结构与类型一致性、重复提交、得分越界、孤立的 student_ID / title_ID、无效专业代码。
+        """
+        start = time.perf_counter()
+        if self.student_info is None:
+            self.load_student_info()
+        if self.title_info is None:
+            self.load_title_info()
+
+        valid_students = pd.Index(self.student_info["student_ID"].dropna().unique())
+        title_max_score = pd.to_numeric(self.title_info["score"], errors="coerce").groupby(
+            self.title_info["title_ID"]).max()
+
+        files = {}
+        key_hashes = []
+        score_issues = {"rows": 0, "examples": []}
+        orphan_students, orphan_titles = {}, {}
+        class_mismatch = {"rows": 0, "examples": []}
+
+        submit_record_files = sorted(
+            (f for f in os.listdir(self.data_dir) if f.startswith('SubmitRecord-Class') and f.endswith('.csv')),
+            key=lambda f: int(''.join(filter(str.isdigit, f)) or 0)
+        )
+        for file in submit_record_files:
+            expected_class = file[len('SubmitRecord-'):-len('.csv')]
+            info = {"rows": 0, "columns": None, "dtypes": {}, "missing": {}}
+            for chunk in pd.read_csv(os.path.join(self.data_dir, file), chunksize=chunksize):
+                if info["columns"] is None:
+                    info["columns"] = chunk.columns.tolist()
+                # 块在文件中的起始行号（不含表头），示例以它定位，不依赖文件里是否有 index 列
+                offset = info["rows"]
+                info["rows"] += len(chunk)
+                for col, dtype in chunk.dtypes.items():
+                    info["dtypes"].setdefault(col, set()).add(str(dtype))
+                for col, count in chunk.isnull().sum().items():
+                    info["missing"][col] = info["missing"].get(col, 0) + int(count)
+
+                # 重复提交：除行号外所有字段相同；数值列统一为浮点，避免 int/float 文件间哈希不一致
+                key_cols = [c for c in self.SUBMIT_COLUMNS if c in chunk.columns and c != "index"]
+                keys = chunk[key_cols].copy()
+                for col in self.NUMERIC_COLUMNS:
+                    if col in keys.columns:
+                        keys[col] = pd.to_numeric(keys[col], errors="coerce").astype("float64")
+                key_hashes.append(pd.util.hash_pandas_object(keys, index=False).to_numpy())
+
+                # 得分越界：非数值、负数或超过题目满分
+                if "score" in chunk.columns and "title_ID" in chunk.columns:
+                    score = pd.to_numeric(chunk["score"], errors="coerce")
+                    max_score = chunk["title_ID"].map(title_max_score)
+                    bad = score.isna() | (score < 0) | (score > max_score)
+                    self._record_issue(score_issues, self._issue_rows(chunk, bad, ["index", "title_ID", "score"], offset),
+                                       file, max_examples)
+
+                # 孤立键：提交记录中的学生 / 题目不在基础信息表中
+                if "student_ID" in chunk.columns:
+                    orphans = chunk.loc[~chunk["student_ID"].isin(valid_students), "student_ID"]
+                    for key, count in orphans.value_counts().items():
+                        orphan_students[key] = orphan_students.get(key, 0) + int(count)
+                if "title_ID" in chunk.columns:
+                    orphans = chunk.loc[~chunk["title_ID"].isin(title_max_score.index), "title_ID"]
+                    for key, count in orphans.value_counts().items():
+                        orphan_titles[key] = orphan_titles.get(key, 0) + int(count)
+
+                # 班级字段与文件名不一致
+                if "class" in chunk.columns:
+                    bad = chunk["class"].astype(str).str.strip() != expected_class
+                    self._record_issue(class_mismatch, self._issue_rows(chunk, bad, ["index", "class"], offset),
+                                       file, max_examples)
+
+            info["dtypes"] = {col: sorted(types) for col, types in info["dtypes"].items()}
+            files[file] = info
+
+        checks = {
+            "schema": self._check_schema(files),
+            "duplicates": self._check_duplicates(key_hashes),
+            "score_range": dict(score_issues, severity="error" if score_issues["rows"] else "ok"),
+            "orphan_student_ids": self._summarize_orphans(orphan_students, max_examples),
+            "orphan_title_ids": self._summarize_orphans(orphan_titles, max_examples),
+            "class_labels": dict(class_mismatch, severity="warning" if class_mismatch["rows"] else "ok"),
+            "major_codes": self._check_major_codes(max_examples),
+            "missing_values": self._check_missing(files),
+        }
+        report = {
+            "generated_at": datetime.now().isoformat(timespec="seconds"),
+            "data_dir": os.path.abspath(self.data_dir),
+            "passed": all(check["severity"] != "error" for check in checks.values()),
+            "total_rows": sum(info["rows"] for info in files.values()),
+            "elapsed_sec": round(time.perf_counter() - start, 3),
+            "checks": checks,
+            "files": files,
+        }
+
+        if report_path:
+            tmp_path = f"{report_path}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(report, f, ensure_ascii=False, indent=2)
+            os.replace(tmp_path, report_path)
+        return report
+
+    @staticmethod
+    def _issue_rows(chunk, bad, columns, offset):
+        """取出问题行的示例列（缺失的列跳过，由结构检查报告），并加上其在文件中的行号 row"""
+        rows = chunk.loc[bad, [c for c in columns if c in chunk.columns]]
+        rows.insert(0, "row", offset + np.flatnonzero(bad.to_numpy()))
+        return rows
+
+    @staticmethod
+    def _record_issue(issue, rows, file, max_examples):
+        """累计问题行数并保留少量示例"""
+        issue["rows"] += int(len(rows))
+        for record in rows.head(max_examples - len(issue["examples"])).to_dict("records"):
+            issue["examples"].append(dict({k: v.item() if hasattr(v, "item") else v for k, v in record.items()}, file=file))
+
+    def _check_schema(self, files):
+        """各班级文件的列集合与列类型是否一致（如 time 在部分文件中为整数、部分为浮点）"""
+        missing_columns = {
+            file: [c for c in self.SUBMIT_COLUMNS if c not in (info["columns"] or [])]
+            for file, info in files.items()
+        }
+        missing_columns = {file: cols for file, cols in missing_columns.items() if cols}
+        dtype_files = {}
+        for file, info in files.items():
+            for col, types in info["dtypes"].items():
+                dtype_files.setdefault(col, {}).setdefault("/".join(types), []).append(file)
+        inconsistent = {col: by_type for col, by_type in dtype_files.items() if len(by_type) > 1}
+        severity = "error" if missing_columns else ("warning" if inconsistent else "ok")
+        return {"severity": severity, "missing_columns": missing_columns, "inconsistent_dtypes": inconsistent}
+
+    @staticmethod
+    def _check_duplicates(key_hashes):
+        """按行哈希统计重复提交（跨文件）"""
+        hashes = np.concatenate(key_hashes) if key_hashes else np.empty(0, dtype=np.uint64)
+        unique_count = len(np.unique(hashes))
+        duplicates = int(len(hashes) - unique_count)
+        return {"severity": "warning" if duplicates else "ok", "rows": duplicates}
+
+    @staticmethod
+    def _summarize_orphans(orphans, max_examples):
+        rows = sum(orphans.values())
+        examples = sorted(orphans, key=orphans.get, reverse=True)[:max_examples]
+        return {"severity": "error" if rows else "ok", "rows": rows, "distinct": len(orphans), "examples": examples}
+
+    def _check_major_codes(self, max_examples):
+        """专业代码需符合 J + 5 位数字"""
+        valid = self.student_info["major"].astype(str).str.match(self.MAJOR_PATTERN, na=False)
+        invalid = self.student_info.loc[~valid, ["student_ID", "major"]]
+        return {
+            "severity": "error" if len(invalid) else "ok",
+            "rows": int(len(invalid)),
+            "examples": invalid.head(max_examples).astype(str).to_dict("records"),
+        }
+
+    def _check_missing(self, files):
+        """提交记录与基础信息表的缺失值统计"""
+        submit_missing = {}
+        for info in files.values():
+            for col, count in info["missing"].items():
+                submit_missing[col] = submit_missing.get(col, 0) + count
+        result = {
+            "submit_records": {k: v for k, v in submit_missing.items() if v},
+            "student_info": {k: int(v) for k, v in self.student_info.isnull().sum().items() if v},
+            "title_info": {k: int(v) for k, v in self.title_info.isnull().sum().items() if v},
+        }
+        has_missing = any(result.values())
+        result["severity"] = "warning" if has_missing else "ok"
+        return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="提交记录数据质量校验")
+    parser.add_argument("--data-dir", default=os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data"))
+    parser.add_argument("--report", default="data_quality_report.json", help="JSON 报告输出路径")
+    parser.add_argument("--chunksize", type=int, default=200000)
+    args = parser.parse_args()
+
+    report = DataQualityChecker(args.data_dir).validate(report_path=args.report, chunksize=args.chunksize)
+    for name, check in report["checks"].items():
+        print(f"{name:<20} {check['severity']}")
+    print(f"共 {report['total_rows']} 行，耗时 {report['elapsed_sec']}s，报告已保存到 {args.report}")
+    # 供夜间导入流程作为关卡：存在 error 级问题时返回非零退出码
+    return 0 if report["passed"] else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
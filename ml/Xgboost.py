@@ -1,16 +1,14 @@
 import os
-import glob
 import pandas as pd
 import numpy as np
 import xgboost as xgb
-import graphviz
-import matplotlib.pyplot as plt
-from datetime import datetime
 from sklearn.model_selection import train_test_split
 from sklearn.preprocessing import StandardScaler
 from sklearn.metrics import accuracy_score
 from pyecharts.charts import Bar
 from pyecharts import options as opts
+from .profiling import trace_stage
+from .columnar_store import load_submit_frame
 
 class XGBoostModelVisualizer:
     def __init__(self, data_path):
@@ -19,16 +17,15 @@ class XGBoostModelVisualizer:
         self.features = None
         self.model = None
         self.importance_df = None
+        self.chart = None
 
+    @trace_stage(rows_out="submit_df")
     def load_data(self):
         """加载所有班级的提交记录数据"""
-        submitrecord_paths = glob.glob(os.path.join(self.data_path, "SubmitRecord-Class*.csv"))
-        submit_df_list = []
-        for path in submitrecord_paths:
-            temp_df = pd.read_csv(path)
-            submit_df_list.append(temp_df)
-        self.submit_df = pd.concat(submit_df_list, ignore_index=True)
+        # 从共享的列式存储读取
+        self.submit_df = load_submit_frame(self.data_path)
 
+    @trace_stage(rows_in="submit_df", rows_out="submit_df")
     def preprocess_data(self):
         """数据预处理"""
         # 判断答题是否完全正确
@@ -42,6 +39,7 @@ class XGBoostModelVisualizer:
         # 将 time 字段转换为日期
         self.submit_df["date"] = pd.to_datetime(self.submit_df["time"], unit="s").dt.date
 
+    @trace_stage(rows_in="submit_df", rows_out="features")
     def aggregate_features(self):
         """按学员聚合特征"""
         # 聚合基本特征
@@ -68,6 +66,7 @@ class XGBoostModelVisualizer:
 
         self.features = features
 
+    @trace_stage(rows_in="features")
     def train_model(self, test_size=0.2, random_state=42):
         """训练 XGBoost 模型"""
         # 准备输入特征和目标变量
@@ -103,6 +102,7 @@ class XGBoostModelVisualizer:
         acc = accuracy_score(y_test, y_pred)
         print(f"Test Accuracy: {acc * 100:.2f}%")
 
+    @trace_stage()
     def visualize_tree(self, output_path=None):
         """可视化决策树"""
         if output_path is None:
@@ -114,6 +114,7 @@ class XGBoostModelVisualizer:
         dot.render(filename=os.path.splitext(output_path)[0], cleanup=True)
         return output_path
 
+    @trace_stage(rows_out="importance_df")
     def visualize_feature_importance(self):
         """可视化特征重要性"""
         # 获取特征重要性
@@ -151,8 +152,10 @@ class XGBoostModelVisualizer:
             yaxis_opts=opts.AxisOpts(name="Importance"),
         )
 
+        self.chart = bar
         return bar.render_embed()
 
+    @trace_stage()
     def create_html(self, output_path=None):
         """创建组合的 HTML 文件"""
         if output_path is None:
@@ -187,6 +190,7 @@ class XGBoostModelVisualizer:
 
         print(f"Visualization saved to: {output_path}")
 
+    @trace_stage()
     def visualize(self, output_path=None):
         """执行整个可视化流程"""
         self.load_data()
@@ -1,5 +1,4 @@
 import os
-import glob
 import pandas as pd
 import numpy as np
 from sklearn.preprocessing import StandardScaler
@@ -7,24 +6,28 @@ from sklearn.cluster import KMeans
 from pyecharts.charts import Scatter3D
 from pyecharts import options as opts
 from pyecharts.globals import ThemeType
+from .profiling import trace_stage
+from .columnar_store import load_submit_frame
 
 class StudentBehaviorClusterVisualizer:
-    def __init__(self, data_path):
+    def __init__(self, data_path, submit_df=None):
         self.data_path = data_path
-        self.submit_df = None
+        # 已传入的提交记录（如按班级批量导出时的班级切片）直接使用，不再读取文件
+        self.submit_df = submit_df
         self.features = None
         self.student_info = None
         self.cluster_centers = None
+        self.chart = None
 
+    @trace_stage(rows_out="submit_df")
     def load_data(self):
         """加载所有班级的提交记录数据"""
-        submitrecord_paths = glob.glob(os.path.join(self.data_path, "SubmitRecord-Class*.csv"))
-        submit_df_list = []
-        for path in submitrecord_paths:
-            temp_df = pd.read_csv(path)
-            submit_df_list.append(temp_df)
-        self.submit_df = pd.concat(submit_df_list, ignore_index=True)
+        if self.submit_df is not None:
+            return
+        # 从共享的列式存储读取
+        self.submit_df = load_submit_frame(self.data_path)
 
+    @trace_stage(rows_in="submit_df", rows_out="submit_df")
     def preprocess_data(self):
         """数据预处理"""
         # 判断答题是否完全正确
@@ -32,6 +35,7 @@ class StudentBehaviorClusterVisualizer:
             lambda x: 1 if "Absolutely_Correct" in str(x).strip() else 0
         )
 
+    @trace_stage(rows_in="submit_df", rows_out="features")
     def aggregate_features(self):
         """按学员聚合特征"""
         self.features = self.submit_df.groupby("student_ID").agg(
@@ -46,12 +50,14 @@ class StudentBehaviorClusterVisualizer:
             self.student_info = pd.read_csv(student_info_path)
             self.features = pd.merge(self.features, self.student_info, on="student_ID", how="left")
 
+    @trace_stage(rows_in="features")
     def standardize_features(self):
         """对特征进行标准化"""
         scaler = StandardScaler()
         X_scaled = scaler.fit_transform(self.features[["submission_count", "avg_score", "accuracy"]])
         return X_scaled
 
+    @trace_stage(rows_in="features", rows_out="features")
     def perform_clustering(self, n_clusters=3, random_state=42):
         """执行KMeans聚类"""
         X_scaled = self.standardize_features()
@@ -59,6 +65,7 @@ class StudentBehaviorClusterVisualizer:
         self.features["cluster"] = kmeans.fit_predict(X_scaled)
         self.cluster_centers = kmeans.cluster_centers_
 
+    @trace_stage(rows_in="features")
     def prepare_3d_data(self):
         """准备3D散点图数据"""
         data_3d = []
@@ -72,6 +79,7 @@ class StudentBehaviorClusterVisualizer:
             ])
         return data_3d
 
+    @trace_stage(rows_in="features")
     def create_3d_scatter(self, data_3d, output_path=None):
         """创建3D散点图"""
         if output_path is None:
@@ -107,9 +115,11 @@ class StudentBehaviorClusterVisualizer:
         )
 
         # 保存图表
+        self.chart = scatter3d
         scatter3d.render(output_path)
         print(f"3D scatter plot saved to: {output_path}")
 
+    @trace_stage()
     def visualize(self, n_clusters=3, output_path=None):
         """执行整个可视化流程"""
         self.load_data()
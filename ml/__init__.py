@@ -1,6 +1,25 @@
-from .knowledge_heatmap import DataVisualizer
-from .radar_chart import ClassRadarVisualizer
-from .Xgboost import XGBoostModelVisualizer
-from .network import NetworkGraphVisualizer
-from ._3d_scatter import StudentBehaviorClusterVisualizer
-from .timeline import TimelineVisualizer
\ No newline at end of file
+import importlib
+
+# 可视化类 -> 所在模块；按需导入（PEP 562），导入 ml 包时不会加载 xgboost、sklearn、plotly 等依赖
+_LAZY_CLASSES = {
+    "DataVisualizer": ".knowledge_heatmap",
+    "ClassRadarVisualizer": ".radar_chart",
+    "XGBoostModelVisualizer": ".Xgboost",
+    "NetworkGraphVisualizer": ".network",
+    "StudentBehaviorClusterVisualizer": "._3d_scatter",
+    "TimelineVisualizer": ".timeline",
+}
+
+__all__ = list(_LAZY_CLASSES)
+
+
+def __getattr__(name):
+    if name in _LAZY_CLASSES:
+        value = getattr(importlib.import_module(_LAZY_CLASSES[name], __name__), name)
+        globals()[name] = value
+        return value
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
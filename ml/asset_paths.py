@@ -0,0 +1,4 @@
+# 本地静态资源的访问前缀与输出目录下的存放位置，由 Flask 在 /assets/ 下提供
+# 单独成模块、不依赖绘图库，服务端只需这两个常量时不必导入 plotly 和 pyecharts
+ASSETS_URL = "/assets"
+ASSETS_DIR_NAME = "assets"
@@ -0,0 +1,148 @@
+import os
+import gzip
+import shutil
+import urllib.request
+from functools import lru_cache
+from .asset_paths import ASSETS_URL, ASSETS_DIR_NAME
+
+# 各页面依赖的运行时文件
+ECHARTS_FILES = ["echarts.min.js", "echarts-gl.min.js"]
+PLOTLY_FILE = "plotly.min.js"
+
+# 需要生成压缩副本的文件类型（图片等已压缩的格式跳过）
+COMPRESSIBLE_EXTENSIONS = (".html", ".json", ".js", ".css", ".svg")
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+_local_assets = False
+
+
+# plotly 与 pyecharts 只在生成页面、准备运行时文件时才导入，服务端导入本模块不加载它们
+@lru_cache(maxsize=None)
+def pyecharts_cdn():
+    """pyecharts 默认的 CDN 地址（首次调用时记录，之后 use_local_assets 修改配置也不影响）"""
+    from pyecharts.globals import CurrentConfig
+    return CurrentConfig.ONLINE_HOST
+
+
+def echarts_version():
+    """CDN 地址末段为 ECharts 主版本（如 v6），用作本地资源的版本号"""
+    return f"echarts-{pyecharts_cdn().rstrip('/').rsplit('/', 1)[-1]}"
+
+
+def plotly_version():
+    import plotly
+    return f"plotly-{plotly.__version__}"
+
+
+def use_local_assets(enabled=True):
+    """让之后生成的所有页面引用本地、带版本号的共享运行时，而不是 CDN 或内嵌的完整库"""
+    from pyecharts.globals import CurrentConfig
+    global _local_assets
+    cdn = pyecharts_cdn()
+    _local_assets = enabled
+    CurrentConfig.ONLINE_HOST = f"{ASSETS_URL}/{echarts_version()}/" if enabled else cdn
+
+
+def plotly_include():
+    """plotly write_html 的 include_plotlyjs 参数：启用本地资源时引用共享文件，否则内嵌"""
+    return f"{ASSETS_URL}/{plotly_version()}/{PLOTLY_FILE}" if _local_assets else True
+
+
+def sync_echarts(asset_dir, source_dir=None):
+    """将 ECharts 运行时准备到 asset_dir 下的版本目录
+
+    依次使用已有的本地副本、source_dir（或环境变量 CHART_ASSET_SOURCE 指定的目录），
+    都没有时在构建阶段从 pyecharts 的资源地址下载一次；仍无法获得时抛出 FileNotFoundError，
+    不生成引用 CDN 的页面。
+    """
+    source_dir = source_dir or os.environ.get("CHART_ASSET_SOURCE")
+    cdn = pyecharts_cdn()
+    echarts_dir = os.path.join(asset_dir, echarts_version())
+    os.makedirs(echarts_dir, exist_ok=True)
+    for file_name in ECHARTS_FILES:
+        target = os.path.join(echarts_dir, file_name)
+        if os.path.exists(target):
+            continue
+        tmp_path = f"{target}.tmp"
+        if source_dir and os.path.exists(os.path.join(source_dir, file_name)):
+            shutil.copyfile(os.path.join(source_dir, file_name), tmp_path)
+        else:
+            print(f"下载运行时文件: {cdn}{file_name}")
+            try:
+                with urllib.request.urlopen(f"{cdn}{file_name}", timeout=60) as resp, \
+                        open(tmp_path, "wb") as f:
+                    shutil.copyfileobj(resp, f)
+            except OSError as e:
+                if os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+                raise FileNotFoundError(
+                    f"无法准备 ECharts 运行时 {file_name}（{e}）：请联网后重新生成，"
+                    f"或用环境变量 CHART_ASSET_SOURCE 指定包含 {'、'.join(ECHARTS_FILES)} 的目录"
+                ) from e
+        os.replace(tmp_path, target)
+    return echarts_dir
+
+
+def sync_plotly(asset_dir):
+    """将已安装 plotly 包自带的 plotly.js 写到 asset_dir 下的版本目录，不需要网络"""
+    plotly_dir = os.path.join(asset_dir, plotly_version())
+    os.makedirs(plotly_dir, exist_ok=True)
+    target = os.path.join(plotly_dir, PLOTLY_FILE)
+    if not os.path.exists(target):
+        from plotly.offline import get_plotlyjs
+        with open(f"{target}.tmp", "w", encoding="utf-8") as f:
+            f.write(get_plotlyjs())
+        os.replace(f"{target}.tmp", target)
+    return plotly_dir
+
+
+def sync_assets(asset_dir, source_dir=None):
+    """将全部运行时文件准备到 asset_dir 下的版本目录"""
+    sync_plotly(asset_dir)
+    sync_echarts(asset_dir, source_dir)
+    return asset_dir
+
+
+def prepare_local_assets(result_dir):
+    """准备本地运行时并让之后生成的页面引用它
+
+    plotly.js 总是取自已安装的包；ECharts 运行时无法准备时抛出 FileNotFoundError 终止生成，
+    不会退回 CDN，也不会再把完整的 plotly.js 内嵌到页面中。
+    """
+    sync_assets(os.path.join(result_dir, ASSETS_DIR_NAME))
+    use_local_assets()
+    return True
+
+
+def precompress_file(path):
+    """为文件写出 .gz（以及安装 brotli 时的 .br）压缩副本"""
+    with open(path, "rb") as f:
+        raw = f.read()
+    siblings = {".gz": gzip.compress(raw, compresslevel=9, mtime=0)}
+    if brotli is not None:
+        siblings[".br"] = brotli.compress(raw, quality=11)
+    for suffix, data in siblings.items():
+        tmp_path = f"{path}{suffix}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, f"{path}{suffix}")
+
+
+def precompress_outputs(output_dir):
+    """为输出目录（含子目录）中所有可压缩的文件生成压缩副本，已是最新的副本跳过"""
+    count = 0
+    for root, _, files in os.walk(output_dir):
+        for file_name in files:
+            if not file_name.endswith(COMPRESSIBLE_EXTENSIONS):
+                continue
+            path = os.path.join(root, file_name)
+            sibling = f"{path}.gz"
+            if os.path.exists(sibling) and os.path.getmtime(sibling) >= os.path.getmtime(path):
+                continue
+            precompress_file(path)
+            count += 1
+    return count
@@ -0,0 +1,54 @@
+import os
+import json
+
+# 图表名称 -> 生成的 HTML 文件名，JSON 数据文件与之同名（扩展名为 .json）
+CHARTS = {
+    "heatmap": "knowledge_heatmap.html",
+    "radar": "class_radar_5dims_normalized.html",
+    "clusters": "student_behavior_3d_clusters.html",
+    "xgboost": "xgb_model_visualization.html",
+    "network": "network_graph.html",
+    "timeline": "all_classes_timeline_tab.html",
+}
+
+# 图表名称 -> 生成流程中对应的阶段名（见 ml.profiling）
+CHART_STAGES = {
+    "heatmap": "DataVisualizer.visualize",
+    "radar": "ClassRadarVisualizer.visualize",
+    "clusters": "StudentBehaviorClusterVisualizer.visualize",
+    "xgboost": "XGBoostModelVisualizer.visualize",
+    "network": "NetworkGraphVisualizer.visualize",
+    "timeline": "TimelineVisualizer.visualize",
+}
+
+
+def chart_json_path(result_dir, name):
+    """图表 JSON 数据文件路径"""
+    return os.path.join(result_dir, os.path.splitext(CHARTS[name])[0] + ".json")
+
+
+def chart_payload(chart, name, data_version):
+    """提取图表的配置项与数据：pyecharts 图表导出 ECharts option，plotly 图表导出 figure JSON"""
+    if hasattr(chart, "dump_options_with_quotes"):
+        renderer = "echarts"
+        option = json.loads(chart.dump_options_with_quotes())
+    else:
+        renderer = "plotly"
+        option = json.loads(chart.to_json())
+    return {
+        "name": name,
+        "renderer": renderer,
+        "data_version": data_version,
+        "option": option,
+    }
+
+
+def write_chart_json(chart, result_dir, name, data_version):
+    """将图表数据写入 JSON 文件（先写临时文件再原子替换）"""
+    output_path = chart_json_path(result_dir, name)
+    payload = chart_payload(chart, name, data_version)
+    tmp_path = f"{output_path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(payload, f, ensure_ascii=False, separators=(",", ":"))
+    os.replace(tmp_path, output_path)
+    return output_path
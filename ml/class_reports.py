@@ -0,0 +1,202 @@
+import os
+import json
+import time
+import shutil
+import argparse
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+import pandas as pd
+
+from .assets import use_local_assets, precompress_outputs
+from .chart_export import CHARTS, write_chart_json
+from .columnar_store import open_submission_store
+from .dataset import load_student_info, load_title_info
+from .registry import get_visualizer
+
+# 每个班级报告包含的图表
+REPORT_CHARTS = ("radar", "heatmap", "timeline", "clusters")
+# 班级报告在输出目录下的子目录，页面经 /charts/classes/<班级>/ 访问
+CLASS_REPORTS_DIR = "classes"
+INDEX_FILE = "index.json"
+
+# 工作进程内共享的数据，由 _init_worker 在进程启动时设置
+_worker = {}
+
+
+def _init_worker(data_path, local_assets, radar_scale):
+    """工作进程初始化：映射列式存储，加载学生与题目信息"""
+    use_local_assets(local_assets)
+    store = open_submission_store(data_path)
+    _worker.update(
+        data_path=data_path,
+        store=store,
+        categories={name: np.asarray(values, dtype=object) for name, values in store.categories.items()},
+        student_df=load_student_info(data_path),
+        title_df=load_title_info(data_path),
+        radar_scale=radar_scale,
+    )
+
+
+def _class_frame(rows):
+    """按行号取出一个班级的提交记录，编码列只对切片还原为字符串"""
+    store, categories = _worker["store"], _worker["categories"]
+    data = {"index": rows}
+    for name, values in store.columns.items():
+        values = values[rows]
+        data[name] = categories[name][values] if name in categories else values
+    return pd.DataFrame(data)
+
+
+def _create_visualizer(name, submit_df):
+    visualizer_cls = get_visualizer(name)
+    data_path = _worker["data_path"]
+    if name == "heatmap":
+        return visualizer_cls(_worker["student_df"], _worker["title_df"], submit_df, data_path)
+    if name == "radar":
+        return visualizer_cls(data_path, submit_df=submit_df, scale=_worker["radar_scale"])
+    return visualizer_cls(data_path, submit_df=submit_df)
+
+
+def _replace_dir(tmp_dir, final_dir):
+    """用写好的临时目录替换旧的报告目录，不会出现写了一半的报告"""
+    old_dir = None
+    if os.path.exists(final_dir):
+        old_dir = f"{tmp_dir}.old"
+        os.replace(final_dir, old_dir)
+    os.replace(tmp_dir, final_dir)
+    if old_dir:
+        shutil.rmtree(old_dir, ignore_errors=True)
+
+
+def _render_report(class_name, rows, output_dir, charts, version):
+    """在工作进程中生成一个班级的全部图表，返回 (班级, 行数, 耗时)"""
+    start = time.perf_counter()
+    tmp_dir = os.path.join(output_dir, f".{class_name}.tmp-{os.getpid()}")
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    os.makedirs(tmp_dir)
+    try:
+        submit_df = _class_frame(rows)
+        for name in charts:
+            # 各可视化会在提交记录上添加列，每个图表使用独立的副本
+            visualizer = _create_visualizer(name, submit_df.copy())
+            visualizer.visualize(output_path=os.path.join(tmp_dir, CHARTS[name]))
+            write_chart_json(visualizer.chart, tmp_dir, name, version)
+        precompress_outputs(tmp_dir)
+        _replace_dir(tmp_dir, os.path.join(output_dir, class_name))
+    except BaseException:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        raise
+    return class_name, len(rows), time.perf_counter() - start
+
+
+def class_slices(store):
+    """按整数班级编码切分行号：返回 {班级名: 行号数组}，不对字符串做逐行比较"""
+    codes = np.asarray(store["class"])
+    names = store.categories["class"]
+    order = np.argsort(codes, kind="stable")
+    bounds = np.concatenate([[0], np.cumsum(np.bincount(codes, minlength=len(names)))])
+    return {name: order[bounds[code]:bounds[code + 1]] for code, name in enumerate(names)
+            if bounds[code + 1] > bounds[code]}
+
+
+def radar_scale(data_path):
+    """全体班级各雷达指标的最大值，作为单班雷达图的归一化基准"""
+    from .radar_query import GroupRadarQuery
+    groups = GroupRadarQuery(data_path).compare("class")["groups"]
+    return {column: max(group["raw"][column] for group in groups) for column in groups[0]["raw"]}
+
+
+def export_class_reports(data_path, output_dir, classes=None, charts=REPORT_CHARTS, workers=None,
+                         local_assets=False):
+    """在进程池中为每个班级生成一份报告，写入 output_dir/<班级>/，返回汇总信息
+
+    主进程只按班级编码切分行号，各工作进程映射同一份列式存储，只读取并还原自己班级的记录。
+    """
+    unknown = [name for name in charts if name not in REPORT_CHARTS]
+    if unknown:
+        raise ValueError(f"不支持按班级导出的图表: {', '.join(unknown)}，可选: {', '.join(REPORT_CHARTS)}")
+    store = open_submission_store(data_path)
+    slices = class_slices(store)
+    if classes:
+        missing = [name for name in classes if name not in slices]
+        if missing:
+            raise ValueError(f"数据中没有班级: {', '.join(missing)}")
+        slices = {name: slices[name] for name in classes}
+    os.makedirs(output_dir, exist_ok=True)
+    scale = radar_scale(data_path) if "radar" in charts else None
+    # 在主进程中导入可视化模块，fork 出的工作进程无需再次导入
+    for name in charts:
+        get_visualizer(name)
+
+    start = time.perf_counter()
+    reports, failed = [], []
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                             initargs=(data_path, local_assets, scale)) as pool:
+        futures = {
+            pool.submit(_render_report, name, rows, output_dir, tuple(charts), store.version): name
+            for name, rows in slices.items()
+        }
+        for future in as_completed(futures):
+            try:
+                class_name, rows, seconds = future.result()
+            except Exception as e:
+                failed.append({"class": futures[future], "error": f"{type(e).__name__}: {e}"})
+                print(f"{futures[future]}: 生成失败（{e}）")
+                continue
+            reports.append({"class": class_name, "rows": rows, "seconds": round(seconds, 3)})
+            print(f"{class_name}: {rows} 行，{seconds:.2f}s")
+    elapsed = time.perf_counter() - start
+    rendered = len(reports)
+
+    # 只导出部分班级时保留索引中同一数据版本下其他班级的记录
+    index_path = os.path.join(output_dir, INDEX_FILE)
+    if classes and os.path.exists(index_path):
+        with open(index_path, encoding="utf-8") as f:
+            previous = json.load(f)
+        if previous.get("data_version") == store.version:
+            done = {r["class"] for r in reports} | {r["class"] for r in failed}
+            reports += [r for r in previous["classes"] if r["class"] not in done]
+    reports.sort(key=lambda r: int(''.join(filter(str.isdigit, r["class"])) or 0))
+    summary = {
+        "data_version": store.version,
+        "charts": {name: CHARTS[name] for name in charts},
+        "classes": reports,
+        "failed": failed,
+        "rendered": rendered,
+        "seconds": round(elapsed, 3),
+        "reports_per_second": round(rendered / elapsed, 3) if elapsed else None,
+        "charts_per_second": round(rendered * len(charts) / elapsed, 3) if elapsed else None,
+    }
+    with open(f"{index_path}.tmp", "w", encoding="utf-8") as f:
+        json.dump(summary, f, ensure_ascii=False, indent=2)
+    os.replace(f"{index_path}.tmp", index_path)
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description="按班级批量导出报告（雷达图、热力图、时间线、聚类图）")
+    parser.add_argument("--classes", nargs="*", help="只导出这些班级，默认全部")
+    parser.add_argument("--charts", nargs="*", default=list(REPORT_CHARTS), choices=REPORT_CHARTS, help="报告包含的图表")
+    parser.add_argument("--workers", type=int, default=None, help="工作进程数，默认为 CPU 核数")
+    parser.add_argument("--data", default="data", help="数据目录")
+    parser.add_argument("--output", default="results", help="输出目录，报告写入其下的 classes/<班级>/")
+    args = parser.parse_args()
+
+    from .assets import prepare_local_assets
+    local_assets = prepare_local_assets(args.output)
+    try:
+        summary = export_class_reports(args.data, os.path.join(args.output, CLASS_REPORTS_DIR), args.classes,
+                                       args.charts, args.workers, local_assets)
+    except ValueError as e:
+        parser.error(str(e))
+    print(f"共生成 {summary['rendered']} 份班级报告（每份 {len(summary['charts'])} 个图表），"
+          f"耗时 {summary['seconds']:.2f}s，吞吐量 {summary['reports_per_second']:.2f} 份/秒"
+          f"（{summary['charts_per_second']:.2f} 图表/秒）")
+    if summary["failed"]:
+        raise SystemExit(f"{len(summary['failed'])} 个班级生成失败: "
+                         f"{', '.join(item['class'] for item in summary['failed'])}")
+
+
+if __name__ == "__main__":
+    main()
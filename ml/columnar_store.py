@@ -0,0 +1,290 @@
+import os
+import re
+import json
+import uuid
+import shutil
+from contextlib import contextmanager
+import numpy as np
+import pandas as pd
+from .dataset import load_submit_records, data_version
+
+try:
+    import fcntl
+except ImportError:     # 非 POSIX 平台没有 fcntl，重建时不做跨进程互斥
+    fcntl = None
+
+# 提交记录的规范化列：(字段名, 存储类型)，None 表示字典编码为 int32
+# 数值列均以浮点存储，缺失或无法解析的取值保留为 NaN，不写成 0
+SUBMIT_COLUMNS = [
+    ("student_ID", None),
+    ("time", "float64"),
+    ("class", None),
+    ("title_ID", None),
+    ("state", None),
+    ("method", None),
+    ("score", "float32"),
+    ("memory", "float64"),
+    ("timeconsume", "float64"),
+]
+
+# 存储格式版本，列的类型或编码方式变化时递增，旧格式的存储在下次打开时重建
+STORE_FORMAT = 2
+
+META_FILE = "meta.json"
+LOCK_FILE = ".lock"
+
+# 保留的 generation 数：读者读到 meta 后，即使恰好发生一次重建，仍能打开它指向的目录
+KEEP_GENERATIONS = 2
+
+_GEN_PATTERN = re.compile(r"^gen-(\d+)$")
+
+
+@contextmanager
+def build_lock(store_dir):
+    """跨进程的重建锁：同一目录同时只有一个进程在写，其余进程等锁后应复查是否仍需重建"""
+    os.makedirs(store_dir, exist_ok=True)
+    with open(os.path.join(store_dir, LOCK_FILE), "a") as f:
+        if fcntl is not None:
+            fcntl.flock(f, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+
+def read_json(path):
+    if not os.path.exists(path):
+        return None
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def new_generation(store_dir, meta_file):
+    """持有重建锁时调用：清理中断的构建留下的目录，返回 (generation, 目录名, 唯一的临时目录)"""
+    previous = read_json(os.path.join(store_dir, meta_file))
+    generation = (previous["generation"] + 1) if previous else 1
+    for entry in os.listdir(store_dir):
+        match = _GEN_PATTERN.match(entry)
+        if ".tmp-" in entry or (match and int(match.group(1)) >= generation):
+            shutil.rmtree(os.path.join(store_dir, entry), ignore_errors=True)
+    gen_name = f"gen-{generation}"
+    tmp_dir = os.path.join(store_dir, f"{gen_name}.tmp-{os.getpid()}-{uuid.uuid4().hex[:8]}")
+    os.makedirs(tmp_dir)
+    return generation, gen_name, tmp_dir
+
+
+def publish_generation(store_dir, tmp_dir, meta, meta_file):
+    """持有重建锁时调用：启用新的 generation 目录，原子替换元数据文件，清理更早的目录"""
+    os.replace(tmp_dir, os.path.join(store_dir, meta["path"]))
+    meta_path = os.path.join(store_dir, meta_file)
+    tmp_meta = f"{meta_path}.tmp-{os.getpid()}"
+    with open(tmp_meta, "w", encoding="utf-8") as f:
+        json.dump(meta, f, ensure_ascii=False)
+    os.replace(tmp_meta, meta_path)
+    # 已映射旧文件的进程不受删除影响
+    for entry in os.listdir(store_dir):
+        match = _GEN_PATTERN.match(entry)
+        if match and int(match.group(1)) <= meta["generation"] - KEEP_GENERATIONS:
+            shutil.rmtree(os.path.join(store_dir, entry), ignore_errors=True)
+
+
+def open_generation(store_dir, meta_file, load, attempts=3):
+    """读取元数据并用 load(meta, 目录) 打开其 generation；目录恰好被并发重建清理时重读元数据"""
+    for attempt in range(attempts):
+        meta = read_json(os.path.join(store_dir, meta_file))
+        if meta is None:
+            raise FileNotFoundError(f"{store_dir} 不存在，请先构建。")
+        try:
+            return meta, load(meta, os.path.join(store_dir, meta["path"]))
+        except FileNotFoundError:
+            if attempt == attempts - 1:
+                raise
+
+
+class ColumnarStore:
+    """内存映射的列式存储
+
+    每列保存为一个 .npy 文件，字符串列字典编码为整数，字典和列信息记录在 meta.json 中。
+    多个进程以只读方式 mmap 同一组文件，共享操作系统页缓存，不会各自复制一份数据。
+    重建在文件锁内写入新的 generation 目录后再原子替换 meta.json，已打开的读者调用 refresh() 即可重新映射。
+    """
+
+    def __init__(self, store_dir):
+        self.store_dir = store_dir
+        # (meta, 各列, 附加数组, 字典) 作为一个整体替换，并发读取时不会拿到不同 generation 的组合
+        self._state = (None, {}, {}, {})
+
+    @property
+    def meta(self):
+        return self._state[0]
+
+    @property
+    def columns(self):
+        return self._state[1]
+
+    @property
+    def arrays(self):
+        return self._state[2]
+
+    @property
+    def categories(self):
+        return self._state[3]
+
+    def snapshot(self):
+        """固定在当前 generation 的只读副本，之后的 refresh() 不会影响它"""
+        view = ColumnarStore(self.store_dir)
+        view._state = self._state
+        return view
+
+    def write(self, df, columns=SUBMIT_COLUMNS, sort_by=None, version=None, extra=None):
+        """编码并写出各列，sort_by 为排序键（按列出顺序排序）
+
+        extra(df, codes, categories) 可返回 (附加数组, 附加属性)，与各列写入同一 generation，
+        由 arrays / meta["attrs"] 读取，随各列一起原子替换。
+        """
+        with build_lock(self.store_dir):
+            return self._write_locked(df, columns, sort_by, version, extra)
+
+    def _write_locked(self, df, columns=SUBMIT_COLUMNS, sort_by=None, version=None, extra=None):
+        generation, gen_name, tmp_dir = new_generation(self.store_dir, META_FILE)
+        try:
+            codes, categories = {}, {}
+            for name, dtype in columns:
+                if dtype is None:
+                    cat = pd.Categorical(df[name].astype(str))
+                    categories[name] = cat.categories.tolist()
+                    codes[name] = cat.codes.astype(np.int32)
+                else:
+                    values = pd.to_numeric(df[name], errors="coerce")
+                    if not np.issubdtype(np.dtype(dtype), np.floating) and values.isna().any():
+                        raise ValueError(f"列 {name} 有 {int(values.isna().sum())} 个缺失或无法解析的值，"
+                                         f"无法以 {dtype} 存储")
+                    codes[name] = values.to_numpy(dtype=dtype)
+
+            if sort_by:
+                # np.lexsort 以最后一个键为主键
+                order = np.lexsort(tuple(codes[name] for name in reversed(sort_by)))
+                codes = {name: values[order] for name, values in codes.items()}
+
+            arrays, attrs = extra(df, codes, categories) if extra else ({}, {})
+            for name, values in {**codes, **arrays}.items():
+                np.save(os.path.join(tmp_dir, f"{name}.npy"), values)
+
+            meta = {
+                "generation": generation,
+                "path": gen_name,
+                "format": STORE_FORMAT,
+                "version": version,
+                "rows": int(len(df)),
+                "sort_by": list(sort_by or []),
+                "columns": [{"name": name, "dtype": str(codes[name].dtype)} for name, _ in columns],
+                "categories": categories,
+                "arrays": list(arrays),
+                "attrs": attrs,
+            }
+            publish_generation(self.store_dir, tmp_dir, meta, META_FILE)
+        except BaseException:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+            raise
+        return self.open()
+
+    def _read_meta(self):
+        return read_json(os.path.join(self.store_dir, META_FILE))
+
+    def exists(self):
+        return self._read_meta() is not None
+
+    def open(self):
+        """以只读内存映射方式打开所有列"""
+        def load(meta, gen_dir):
+            columns = {
+                col["name"]: np.load(os.path.join(gen_dir, f"{col['name']}.npy"), mmap_mode="r")
+                for col in meta["columns"]
+            }
+            arrays = {
+                name: np.load(os.path.join(gen_dir, f"{name}.npy"), mmap_mode="r")
+                for name in meta.get("arrays", [])
+            }
+            return columns, arrays
+
+        meta, (columns, arrays) = open_generation(self.store_dir, META_FILE, load)
+        self._state = (meta, columns, arrays, meta["categories"])
+        return self
+
+    def refresh(self):
+        """存储被重建后重新映射，未变化或尚未构建时不做任何事"""
+        meta = self._read_meta()
+        if meta is not None and (self.meta is None or meta["generation"] != self.meta["generation"]):
+            self.open()
+        return self
+
+    def open_or_write(self, version, load, **write_kwargs):
+        """打开与 version 一致的存储；不一致时取得重建锁后复查，仍不一致才用 load() 的数据重建
+
+        多个工作进程同时发现数据变化时只有一个进程重建，其余进程等锁后直接映射新结果。
+        """
+        self.refresh()
+        if self._matches(version):
+            return self
+        with build_lock(self.store_dir):
+            self.refresh()
+            if not self._matches(version):
+                self._write_locked(load(), version=version, **write_kwargs)
+        return self
+
+    def _matches(self, version):
+        meta = self.meta
+        return meta is not None and meta["version"] == version and meta.get("format") == STORE_FORMAT
+
+    @property
+    def version(self):
+        meta = self.meta
+        return meta["version"] if meta else None
+
+    def __len__(self):
+        meta = self.meta
+        return meta["rows"] if meta else 0
+
+    def __getitem__(self, name):
+        return self.columns[name]
+
+    def decode(self, name, codes):
+        """将编码还原为原始字符串"""
+        return np.asarray(self.categories[name], dtype=object)[codes]
+
+    def to_frame(self, columns=None, decode=True):
+        """转换为 DataFrame；数值列直接引用映射数组，编码列可还原为 Categorical"""
+        _, stored, _, categories = self._state
+        data = {}
+        for name in columns or list(stored):
+            values = stored[name]
+            if decode and name in categories:
+                data[name] = pd.Categorical.from_codes(values, categories=categories[name])
+            else:
+                data[name] = values
+        return pd.DataFrame(data, copy=False)
+
+
+# 每个进程内已打开的存储（按目录），fork 出的工作进程继承同一份映射
+_stores = {}
+
+
+def open_submission_store(data_path, store_dir=None):
+    """打开提交记录列式存储，不存在或数据版本变化时先重建；同一进程内重复打开只做重新映射"""
+    store_dir = store_dir or os.path.join(data_path, "cache", "columnar")
+    store = _stores.setdefault(store_dir, ColumnarStore(store_dir))
+    return store.open_or_write(data_version(data_path), lambda: load_submit_records(data_path))
+
+
+def load_submit_frame(data_path, columns=None):
+    """从共享的列式存储读取提交记录，代替逐个读取班级 CSV
+
+    编码列还原为字符串（与读取 CSV 一致），数值列直接引用映射数组；
+    "index" 列为记录在存储中的行号（各可视化用它计数）。
+    """
+    store = open_submission_store(data_path).snapshot()
+    data = {"index": np.arange(len(store))}
+    for name in columns or list(store.columns):
+        data[name] = store.decode(name, store[name]) if name in store.categories else store[name]
+    return pd.DataFrame(data, copy=False)
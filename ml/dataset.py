@@ -0,0 +1,52 @@
+import os
+import glob
+import hashlib
+import pandas as pd
+
+STUDENT_INFO_FILE = "Data_StudentInfo.csv"
+TITLE_INFO_FILE = "Data_TitleInfo.csv"
+SUBMIT_RECORD_PATTERN = "SubmitRecord-Class*.csv"
+
+
+def submit_record_paths(data_path):
+    """返回所有班级提交记录文件路径（按班级编号自然排序）"""
+    paths = glob.glob(os.path.join(data_path, SUBMIT_RECORD_PATTERN))
+    return sorted(paths, key=lambda p: int(''.join(filter(str.isdigit, os.path.basename(p))) or 0))
+
+
+def load_student_info(data_path):
+    """加载学生信息数据"""
+    return pd.read_csv(os.path.join(data_path, STUDENT_INFO_FILE))
+
+
+def load_title_info(data_path):
+    """加载题目信息数据"""
+    return pd.read_csv(os.path.join(data_path, TITLE_INFO_FILE))
+
+
+def load_submit_records(data_path):
+    """加载并合并所有班级的提交记录"""
+    paths = submit_record_paths(data_path)
+    if not paths:
+        raise FileNotFoundError(f"未找到任何 {SUBMIT_RECORD_PATTERN} 文件，请检查 {data_path} 目录。")
+    return pd.concat([pd.read_csv(path) for path in paths], ignore_index=True)
+
+
+def data_files(data_path):
+    """返回存在的全部数据文件路径"""
+    paths = [os.path.join(data_path, STUDENT_INFO_FILE), os.path.join(data_path, TITLE_INFO_FILE)]
+    return [path for path in paths + submit_record_paths(data_path) if os.path.exists(path)]
+
+
+def data_updated_at(data_path):
+    """数据文件的最近修改时间（Unix 时间戳），没有数据文件时返回 None"""
+    return max((os.path.getmtime(path) for path in data_files(data_path)), default=None)
+
+
+def data_version(data_path):
+    """根据数据文件的名称、大小和修改时间计算数据版本号，数据重建后版本号随之变化"""
+    hasher = hashlib.sha1()
+    for path in data_files(data_path):
+        stat = os.stat(path)
+        hasher.update(f"{os.path.basename(path)}:{stat.st_size}:{stat.st_mtime_ns}".encode("utf-8"))
+    return hasher.hexdigest()[:12]
@@ -0,0 +1,269 @@
+import os
+import json
+import hashlib
+import numpy as np
+from scipy import sparse
+from scipy.sparse.csgraph import connected_components
+from scipy.sparse.linalg import eigsh, lobpcg, ArpackNoConvergence
+
+# 布局算法版本，算法变化时使旧的缓存失效
+LAYOUT_VERSION = 2
+
+
+def graph_fingerprint(nodes, edges):
+    """根据节点和边计算图指纹（与节点/边的顺序无关）"""
+    hasher = hashlib.sha1()
+    for node_id in sorted(str(node["id"]) for node in nodes):
+        hasher.update(node_id.encode("utf-8"))
+        hasher.update(b"\0")
+    hasher.update(b"\1")
+    for source, target in sorted((str(e["source"]), str(e["target"])) for e in edges):
+        hasher.update(f"{source}->{target}".encode("utf-8"))
+        hasher.update(b"\0")
+    return hasher.hexdigest()
+
+
+def _edge_index(nodes, edges):
+    """将边转换为节点下标数组"""
+    index = {str(node["id"]): i for i, node in enumerate(nodes)}
+    pairs = [
+        (index[str(e["source"])], index[str(e["target"])])
+        for e in edges
+        if str(e["source"]) in index and str(e["target"]) in index
+    ]
+    if not pairs:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+    pairs = np.asarray(pairs, dtype=np.int64)
+    return pairs[:, 0], pairs[:, 1]
+
+
+def _adjacency(n_nodes, src, dst):
+    """对称的稀疏邻接矩阵"""
+    adj = sparse.coo_matrix((np.ones(len(src)), (src, dst)), shape=(n_nodes, n_nodes)).tocsr()
+    return adj + adj.T
+
+
+def _spectral_component(adj, rng):
+    """连通图的谱布局：求 L x = λ D x 最小的两个非平凡特征向量
+
+    等价于归一化拉普拉斯矩阵 I - N（N = D^-1/2 A D^-1/2）最小的特征向量再乘以 D^-1/2。
+    对 L 直接求最小特征值（which="SM"）收敛很慢，这里平移谱后改求 N 最大的特征值，只需矩阵乘向量，
+    也不用像 shift-invert 那样分解矩阵（枢纽节点多时填充严重）；ARPACK 不收敛时改用 LOBPCG，
+    并以已知的平凡特征向量 D^1/2 1 作为约束。
+    """
+    n_nodes = adj.shape[0]
+    degree = np.asarray(adj.sum(axis=1)).ravel()
+    inv_sqrt = 1.0 / np.sqrt(degree)
+    normalized = (sparse.diags(inv_sqrt) @ adj @ sparse.diags(inv_sqrt)).tocsr()
+    try:
+        # 特征值升序排列，最后一个为平凡的 1
+        _, vectors = eigsh(normalized, k=3, which="LA", tol=1e-6, v0=rng.uniform(size=n_nodes))
+        vectors = vectors[:, :2]
+    except ArpackNoConvergence:
+        trivial = np.sqrt(degree)[:, None]
+        laplacian = sparse.identity(n_nodes, format="csr") - normalized
+        _, vectors = lobpcg(laplacian, rng.normal(size=(n_nodes, 2)), Y=trivial / np.linalg.norm(trivial),
+                            largest=False, tol=1e-6, maxiter=500)
+    return vectors * inv_sqrt[:, None]
+
+
+def _normalize(coords):
+    """平移到原点并缩放到 [-1, 1]"""
+    coords = coords - coords.mean(axis=0)
+    span = np.abs(coords).max()
+    return coords / span if span > 0 else coords
+
+
+def spectral_layout(n_nodes, src, dst, seed=42):
+    """谱布局：返回 (坐标, 连通分量编号)，每个连通分量单独计算后缩放到 [-1, 1]
+
+    整图直接求特征向量时，最小的特征值对应各个小连通分量，坐标集中在少数节点上，
+    其余节点挤成一团，因此按连通分量分别求解。
+    """
+    rng = np.random.default_rng(seed)
+    if n_nodes == 0:
+        return np.empty((0, 2)), np.empty(0, dtype=np.int64)
+    adj = _adjacency(n_nodes, src, dst)
+    _, labels = connected_components(adj, directed=False)
+    coords = np.zeros((n_nodes, 2))
+    for members in _component_members(labels):
+        if len(members) <= 3:
+            # 节点过少无法求两个非平凡特征向量，放在单位圆上
+            angle = 2 * np.pi * np.arange(len(members)) / len(members) + rng.uniform(0, np.pi)
+            coords[members] = np.column_stack([np.cos(angle), np.sin(angle)]) * (len(members) > 1)
+        else:
+            coords[members] = _normalize(_spectral_component(adj[members][:, members], rng))
+    # 加入少量抖动，避免多个节点重合
+    return coords + rng.normal(scale=1e-3, size=coords.shape), labels
+
+
+def _component_members(labels):
+    """按连通分量分组的节点下标，从大到小排列"""
+    order = np.argsort(labels, kind="stable")
+    bounds = np.concatenate([[0], np.cumsum(np.bincount(labels))])
+    members = [order[bounds[i]:bounds[i + 1]] for i in range(len(bounds) - 1)]
+    return sorted(members, key=len, reverse=True)
+
+
+def pack_components(pos, labels):
+    """将各连通分量（坐标均在 [-1, 1] 内）按大小缩放后逐行排列，返回整体坐标
+
+    每个分量占据边长与 sqrt(节点数) 成正比的方格，行宽取全部方格面积的平方根。
+    """
+    members = _component_members(labels)
+    sides = [np.sqrt(len(m)) for m in members]
+    row_width = max(np.sqrt(sum(side * side for side in sides)), sides[0])
+    packed = np.empty_like(pos)
+    x = y = row_height = 0.0
+    for component, side in zip(members, sides):
+        if x > 0 and x + side > row_width:
+            x, y, row_height = 0.0, y + row_height, 0.0
+        # 方格内留 10% 间隔
+        packed[component] = pos[component] * (0.45 * side) + [x + side / 2, y + side / 2]
+        x += side
+        row_height = max(row_height, side)
+    return packed
+
+
+def force_directed_layout(n_nodes, src, dst, iterations=200, seed=42, init=None, temperature=0.1, sample=None):
+    """向量化的 Fruchterman-Reingold 力导向布局
+
+    sample 为每轮计算斥力时随机抽取的节点数，用于节点较多、两两斥力矩阵放不下的图，
+    斥力按抽样比例放大；为 None 时计算全部节点两两之间的斥力。
+    """
+    rng = np.random.default_rng(seed)
+    pos = init.copy() if init is not None else rng.uniform(-1, 1, size=(n_nodes, 2))
+    pos = pos.astype(np.float32)  # 单精度足够布局使用，可减半内存带宽
+    if n_nodes <= 1:
+        return pos
+
+    k = np.sqrt(4.0 / n_nodes)          # 理想边长（布局区域为 [-1, 1] x [-1, 1]）
+    cooling = temperature / (iterations + 1)
+    sampled = sample is not None and sample < n_nodes
+
+    for _ in range(iterations):
+        # 斥力：与所有节点（或随机抽取的节点）之间，按坐标分量计算以减少临时数组
+        others = pos[rng.choice(n_nodes, size=sample, replace=False)] if sampled else pos
+        dx = pos[:, 0, None] - others[None, :, 0]
+        dy = pos[:, 1, None] - others[None, :, 1]
+        force = dx * dx
+        force += dy * dy
+        np.maximum(force, 1e-8, out=force)
+        np.divide(k * k * (n_nodes / len(others)), force, out=force)
+        displacement = np.column_stack([(dx * force).sum(axis=1), (dy * force).sum(axis=1)])
+
+        # 引力：仅沿边
+        if len(src):
+            edge_delta = pos[src] - pos[dst]
+            edge_distance = np.maximum(np.linalg.norm(edge_delta, axis=-1), 1e-4)
+            pull = edge_delta * (edge_distance / k)[:, None]
+            np.add.at(displacement, src, -pull)
+            np.add.at(displacement, dst, pull)
+
+        # 位移受温度限制
+        length = np.maximum(np.linalg.norm(displacement, axis=-1), 1e-4)
+        pos += displacement * (np.minimum(length, temperature) / length)[:, None]
+        temperature -= cooling
+
+    return pos
+
+
+class GraphLayoutCache:
+    """按图指纹和布局参数缓存节点坐标，同一张图只在服务端计算一次布局"""
+
+    # 连通分量节点数超过该阈值时，两两斥力矩阵过大，改为抽样斥力做少量迭代微调谱布局
+    FORCE_MAX_NODES = 2000
+    REFINE_ITERATIONS = 50
+    REFINE_SAMPLE = 512
+    # 缓存目录最多保留的布局数，超出时删除最久未使用的
+    MAX_CACHE_ENTRIES = 32
+
+    def __init__(self, cache_dir, width=1200, height=800, iterations=200, seed=42):
+        self.cache_dir = cache_dir
+        self.width = width
+        self.height = height
+        self.iterations = iterations
+        self.seed = seed
+
+    def cache_key(self, nodes, edges):
+        """图指纹加上影响结果的布局参数"""
+        params = f"{graph_fingerprint(nodes, edges)}:{LAYOUT_VERSION}:{self.iterations}:{self.seed}:{self.width}x{self.height}"
+        return hashlib.sha1(params.encode("utf-8")).hexdigest()
+
+    def cache_path(self, key):
+        return os.path.join(self.cache_dir, f"{key}.json")
+
+    def _refine(self, pos, labels, src, dst):
+        """在每个连通分量内部用力导向布局微调谱布局坐标"""
+        edge_order = np.argsort(labels[src], kind="stable")
+        edge_bounds = np.concatenate([[0], np.cumsum(np.bincount(labels[src], minlength=labels.max() + 1))])
+        local = np.empty(len(labels), dtype=np.int64)
+        for members in _component_members(labels):
+            if len(members) <= 3:
+                continue
+            label = labels[members[0]]
+            local[members] = np.arange(len(members))
+            edges = edge_order[edge_bounds[label]:edge_bounds[label + 1]]
+            if len(members) <= self.FORCE_MAX_NODES:
+                refined = force_directed_layout(len(members), local[src[edges]], local[dst[edges]],
+                                                iterations=self.iterations, seed=self.seed, init=pos[members])
+            else:
+                refined = force_directed_layout(len(members), local[src[edges]], local[dst[edges]],
+                                                iterations=self.REFINE_ITERATIONS, seed=self.seed,
+                                                init=pos[members], temperature=0.05, sample=self.REFINE_SAMPLE)
+            pos[members] = _normalize(refined)
+        return pos
+
+    def compute(self, nodes, edges):
+        """计算布局，返回 {节点id: (x, y)}，坐标已映射到画布像素"""
+        n_nodes = len(nodes)
+        src, dst = _edge_index(nodes, edges)
+        pos, labels = spectral_layout(n_nodes, src, dst, seed=self.seed)
+
+        # 归一化到画布，四周留 5% 边距
+        if n_nodes:
+            pos = pack_components(self._refine(pos, labels, src, dst), labels)
+            low, high = pos.min(axis=0), pos.max(axis=0)
+            span = np.where(high - low > 0, high - low, 1.0)
+            unit = (pos - low) / span
+            pos = np.column_stack([
+                (0.05 + 0.9 * unit[:, 0]) * self.width,
+                (0.05 + 0.9 * unit[:, 1]) * self.height,
+            ])
+        return {str(node["id"]): (float(x), float(y)) for node, (x, y) in zip(nodes, pos)}
+
+    def _prune(self):
+        """只保留最近使用的 MAX_CACHE_ENTRIES 个布局文件"""
+        entries = []
+        for name in os.listdir(self.cache_dir):
+            if name.endswith(".json"):
+                path = os.path.join(self.cache_dir, name)
+                try:
+                    entries.append((os.path.getmtime(path), path))
+                except FileNotFoundError:
+                    continue
+        for _, path in sorted(entries, reverse=True)[self.MAX_CACHE_ENTRIES:]:
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+    def get_or_compute(self, nodes, edges):
+        """优先读取缓存，未命中时计算布局并写入缓存"""
+        path = self.cache_path(self.cache_key(nodes, edges))
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                cached = json.load(f)
+            os.utime(path)  # 记录最近使用时间，供清理时参考
+            return {k: tuple(v) for k, v in cached["positions"].items()}
+        except (FileNotFoundError, ValueError, KeyError):
+            pass
+
+        positions = self.compute(nodes, edges)
+        os.makedirs(self.cache_dir, exist_ok=True)
+        tmp_path = f"{path}.tmp-{os.getpid()}"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"width": self.width, "height": self.height, "positions": positions}, f)
+        os.replace(tmp_path, path)
+        self._prune()
+        return positions
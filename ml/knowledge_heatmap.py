@@ -1,6 +1,9 @@
 import pandas as pd
 import plotly.express as px
 import os
+from .assets import plotly_include
+from .profiling import trace_stage
+from .columnar_store import load_submit_frame
 
 class DataVisualizer:
     def __init__(self, student_df, title_df, submit_df, data_path):
@@ -9,44 +12,41 @@ class DataVisualizer:
         self.submit_df = submit_df
         self.data_path = data_path  # 添加 data_path 属性
         self.merged = None
+        self.chart = None
 
+    @trace_stage(rows_out="submit_df")
     def load_data(self):
         """加载数据"""
-        # 初始化 submit_df 为一个空的 DataFrame
-        submit_df = pd.DataFrame()
+        # 已传入提交记录（如按班级批量导出时的班级切片）时直接使用
+        if not self.submit_df.empty:
+            return
 
-        # 加载提交记录数据（合并所有班级的CSV文件）
-        for class_num in range(1, 16):
-            file_path = os.path.join(self.data_path, f'SubmitRecord-Class{class_num}.csv')
-            print(f"尝试加载文件: {file_path}")  # 添加调试信息
-            if os.path.exists(file_path):
-                class_df = pd.read_csv(file_path)
-                # 检查class列是否存在
-                if 'class' not in class_df.columns:
-                    raise KeyError(f"文件 {file_path} 中缺少 'class' 列，请检查数据结构。")
-                submit_df = pd.concat([submit_df, class_df], ignore_index=True)
-            else:
-                print(f"警告：文件 {file_path} 不存在，跳过。")
-    
-        # 检查 submit_df 是否为空
+        # 从共享的列式存储读取所有班级的提交记录
+        submit_df = load_submit_frame(self.data_path)
         if submit_df.empty:
             raise ValueError("提交记录数据为空，请检查文件路径和内容。")
-    
         self.submit_df = submit_df
 
+    @trace_stage(rows_in="submit_df", rows_out="student_df")
     def clean_data(self):
         """清洗数据"""
         # 清洗无效专业
         valid_majors = self.student_df['major'].str.match(r'^J\d{5}$', na=False)
         self.student_df = self.student_df[valid_majors].copy()
 
-        # 处理班级排序
+        # 处理班级排序（按班级编号自然排序）
         self.submit_df['class'] = pd.Categorical(
             self.submit_df['class'], 
-            categories=[f'Class{i}' for i in range(1, 16)], 
+            categories=self.class_order(), 
             ordered=True
         )
 
+    def class_order(self):
+        """数据中出现的班级，按班级编号排序（Class1, Class2 ... Class10）"""
+        classes = self.submit_df['class'].dropna().astype(str).unique()
+        return sorted(classes, key=lambda x: int(''.join(filter(str.isdigit, x)) or 0))
+
+    @trace_stage(rows_in="submit_df", rows_out="merged")
     def merge_data(self):
         """合并数据"""
         # 避免列名冲突：仅保留submit_df的score
@@ -56,6 +56,7 @@ class DataVisualizer:
                    on='title_ID', how='left')
         )
 
+    @trace_stage(rows_in="merged", rows_out="merged")
     def extract_knowledge_hierarchy(self):
         """提取知识点层级"""
         # 从sub_knowledge中拆分主知识点
@@ -63,6 +64,7 @@ class DataVisualizer:
             self.merged['sub_knowledge'].str.split('_', n=1, expand=True)
         )
 
+    @trace_stage(rows_in="merged", rows_out="merged")
     def filter_invalid_data(self):
         """过滤无效数据"""
         # 移除无知识点或得分异常的记录
@@ -72,6 +74,7 @@ class DataVisualizer:
             (self.merged['score'] > 0)  # 过滤0分记录
         ]
 
+    @trace_stage(rows_in="merged")
     def aggregate_data(self):
         """按班级、专业、知识点聚合平均得分"""
         agg_df = (
@@ -81,6 +84,7 @@ class DataVisualizer:
         )
         return agg_df
 
+    @trace_stage(rows_in="merged")
     def generate_heatmap(self, agg_df, output_path):
         """生成分面热力图"""
         fig = px.density_heatmap(
@@ -93,7 +97,7 @@ class DataVisualizer:
             color_continuous_scale='RdYlGn',
             range_color=[0, self.merged['score'].max()],
             category_orders={
-                'class': [f'Class{i}' for i in range(1, 16)],  # 强制班级顺序
+                'class': list(self.submit_df['class'].cat.categories),  # 强制班级顺序
                 'major': sorted(self.merged['major'].unique())  # 专业按字母排序
             },
             labels={
@@ -101,7 +105,7 @@ class DataVisualizer:
                 'knowledge_main': '主知识点',
                 'score': '平均得分'
             },
-            height=3000  # 根据班级数量调整
+            height=max(600, 200 * len(self.submit_df['class'].cat.categories))  # 根据班级数量调整
         )
 
         # 优化布局
@@ -112,9 +116,11 @@ class DataVisualizer:
             yaxis=dict(automargin=True)
         )
 
-        # 保存为HTML
-        fig.write_html(output_path)
+        # 保存为HTML（启用本地资源时引用共享的 plotly.js，而不是内嵌完整库）
+        self.chart = fig
+        fig.write_html(output_path, include_plotlyjs=plotly_include())
 
+    @trace_stage()
     def visualize(self, output_path="knowledge_heatmap.html"):
         """执行整个可视化流程"""
         self.load_data()
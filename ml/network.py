@@ -1,22 +1,28 @@
 import os
-import glob
 import pandas as pd
 from pyecharts.charts import Graph
 from pyecharts import options as opts
+from .graph_layout import GraphLayoutCache
+from .profiling import trace_stage
+from .columnar_store import load_submit_frame
 
 class NetworkGraphVisualizer:
-    def __init__(self, data_path):
+    def __init__(self, data_path, layout_cache_dir=None):
         self.data_path = data_path
+        # 布局缓存目录，默认放在数据目录下
+        self.layout_cache_dir = layout_cache_dir or os.path.join(data_path, "cache", "layout")
         self.df_title = None
         self.df_student = None
         self.df_submit = None
         self.nodes = []
         self.edges = []
+        self.chart = None
         self.categories = [
             {"name": "题目"},
             {"name": "知识点"}
         ]
 
+    @trace_stage(rows_out="df_submit")
     def load_data(self):
         """加载数据"""
         # 加载题目基本信息
@@ -28,20 +34,17 @@ class NetworkGraphVisualizer:
         if os.path.exists(student_path):
             self.df_student = pd.read_csv(student_path)
 
-        # 加载所有班级的提交记录
-        submit_paths = glob.glob(os.path.join(self.data_path, "SubmitRecord-Class*.csv"))
-        submit_list = []
-        for path in submit_paths:
-            temp = pd.read_csv(path)
-            submit_list.append(temp)
-        self.df_submit = pd.concat(submit_list, ignore_index=True)
+        # 从共享的列式存储读取所有班级的提交记录（只需题目列）
+        self.df_submit = load_submit_frame(self.data_path, columns=["title_ID"])
 
+    @trace_stage(rows_in="df_submit", rows_out="df_title")
     def calculate_submission_counts(self):
         """统计每道题目的提交次数"""
         submission_counts = self.df_submit.groupby("title_ID").size().reset_index(name="submission_count")
         self.df_title = pd.merge(self.df_title, submission_counts, on="title_ID", how="left")
         self.df_title["submission_count"] = self.df_title["submission_count"].fillna(0)
 
+    @trace_stage(rows_in="df_title", rows_out="nodes")
     def construct_nodes_and_edges(self):
         """构造节点和边"""
         nodes_dict = {}  # key: 节点id, value: 节点信息
@@ -85,6 +88,15 @@ class NetworkGraphVisualizer:
         self.nodes = list(nodes_dict.values())
         self.edges = edges
 
+    @trace_stage(rows_in="nodes", rows_out="nodes")
+    def compute_layout(self, width=1200, height=800):
+        """在服务端预先计算节点坐标（按图指纹缓存），浏览器无需再模拟力导向布局"""
+        layout_cache = GraphLayoutCache(self.layout_cache_dir, width=width, height=height)
+        positions = layout_cache.get_or_compute(self.nodes, self.edges)
+        for node in self.nodes:
+            node["x"], node["y"] = positions[node["id"]]
+
+    @trace_stage(rows_in="nodes")
     def create_network_graph(self, output_path=None):
         """创建网络图"""
         if output_path is None:
@@ -97,19 +109,21 @@ class NetworkGraphVisualizer:
                 self.nodes,
                 self.edges,
                 categories=self.categories,
-                repulsion=800,
-                edge_length=[10, 50],
+                layout="none",  # 使用 compute_layout 预先计算好的固定坐标
                 label_opts=opts.LabelOpts(is_show=True, position="right")
             )
             .set_global_opts(title_opts=opts.TitleOpts(title="题目与知识点关联网络图"))
         )
 
+        self.chart = graph
         graph.render(output_path)
         print(f"Network graph saved to: {output_path}")
 
+    @trace_stage()
     def visualize(self, output_path=None):
         """执行整个可视化流程"""
         self.load_data()
         self.calculate_submission_counts()
         self.construct_nodes_and_edges()
+        self.compute_layout()
         self.create_network_graph(output_path)
@@ -0,0 +1,242 @@
+import os
+import shutil
+import numpy as np
+import pandas as pd
+from .columnar_store import (open_submission_store, build_lock, read_json, new_generation,
+                             publish_generation, open_generation)
+from .reloadable import Reloadable
+
+# 时间分区粒度（pandas Period 频率），默认按周
+PARTITION_FREQ = "W"
+
+MANIFEST_FILE = "manifest.json"
+
+# time 缺失的记录所在的时间段，单独成一个分区，不会被按时间范围的查询命中
+UNKNOWN_PERIOD = "unknown"
+
+
+def to_timestamp(value):
+    """将 Unix 时间戳或日期字符串（按 UTC 解释）统一为秒级时间戳，None 原样返回；其他类型抛出 ValueError"""
+    if value is None or value == "":
+        return None
+    if isinstance(value, bool) or not isinstance(value, (str, int, float)):
+        raise ValueError(f"无法解析的时间: {value!r}")
+    try:
+        return float(value)
+    except ValueError:
+        return pd.Timestamp(value, tz="UTC").timestamp()
+
+
+class PartitionView:
+    """打开后的一份分区数据：清单、各分区行号与对应 generation 的列式存储，之后不再变化
+
+    查询只通过同一个视图裁剪和读取，重建分区或列式存储时旧视图仍可继续使用。
+    """
+
+    def __init__(self, manifest, rows, store):
+        self.manifest = manifest
+        self.rows = rows
+        self.store = store
+        self.categories = store.categories
+        self._lookups = {}
+
+    def _codes_of(self, name, values):
+        """将取值转换为全局编码，不存在的取值被忽略"""
+        if name not in self._lookups:
+            self._lookups[name] = {v: i for i, v in enumerate(self.categories[name])}
+        lookup = self._lookups[name]
+        return {lookup[v] for v in map(str, values) if v in lookup}
+
+    def prune(self, classes=None, start=None, end=None, students=None):
+        """返回可能包含所需记录的分区；时间范围为 [start, end)"""
+        start, end = to_timestamp(start), to_timestamp(end)
+        class_set = {str(c) for c in classes} if classes else None
+        student_codes = self._codes_of("student_ID", students) if students else None
+        selected = []
+        for part in self.manifest["partitions"]:
+            if class_set is not None and part["class"] not in class_set:
+                continue
+            if (start is not None or end is not None) and part["period"] == UNKNOWN_PERIOD:
+                continue
+            if start is not None and part["max_time"] < start:
+                continue
+            if end is not None and part["min_time"] >= end:
+                continue
+            if student_codes is not None and student_codes.isdisjoint(part["students"]):
+                continue
+            selected.append(part)
+        return selected
+
+    def read(self, columns=None, classes=None, start=None, end=None, students=None, categorical=False):
+        """读取裁剪后的分区并按条件过滤记录
+
+        "index" 列为记录在列式存储中的行号。字符串列默认还原为字符串（与直接读取 CSV 一致），
+        categorical=True 时返回共享字典的 Categorical。
+        """
+        parts = self.prune(classes, start, end, students)
+        columns = list(columns or ["index"] + list(self.store.columns))
+        rows = np.concatenate([self.rows[part["path"]] for part in parts]) if parts else np.empty(0, dtype=np.int64)
+
+        # 分区粒度较粗，边界分区中的记录还需逐行过滤
+        mask = None
+        start, end = to_timestamp(start), to_timestamp(end)
+        if start is not None or end is not None:
+            times = self.store["time"][rows]
+            if start is not None:
+                mask = times >= start
+            if end is not None:
+                mask = (times < end) if mask is None else mask & (times < end)
+        if students:
+            in_students = np.isin(self.store["student_ID"][rows], list(self._codes_of("student_ID", students)))
+            mask = in_students if mask is None else mask & in_students
+        if mask is not None:
+            rows = rows[mask]
+
+        frame = {}
+        for name in columns:
+            if name == "index":
+                frame[name] = rows
+                continue
+            values = self.store[name][rows]
+            if name in self.categories:
+                cats = self.categories[name]
+                frame[name] = pd.Categorical.from_codes(values, categories=cats) if categorical \
+                    else np.asarray(cats, dtype=object)[values]
+            else:
+                frame[name] = values
+        return pd.DataFrame(frame)
+
+
+class PartitionedDataset:
+    """按班级和时间段分区的提交记录
+
+    分区不另存数据副本：每个分区只保存其记录在提交记录列式存储中的行号（rows.npy），
+    读取时从共享的内存映射列中按行号取值，字符串列沿用存储的字典编码。
+    manifest.json 记录每个分区的班级、时间段、行数、最早/最晚提交时间和学生集合，
+    查询时先据此裁剪分区，只读取命中的分区。
+
+    打开的数据保存为一个 PartitionView，由 current() 取得；数据变化后调用 mark_stale()，
+    下一次 current() 在锁内重建并整体替换视图。
+    """
+
+    def __init__(self, data_path, store_dir=None, freq=PARTITION_FREQ):
+        self.data_path = data_path
+        self.store_dir = store_dir or os.path.join(data_path, "cache", "partitions")
+        self.freq = freq
+        self._view = Reloadable(self._open_or_build)
+
+    @property
+    def manifest(self):
+        view = self._view.value
+        return view.manifest if view is not None else None
+
+    @property
+    def categories(self):
+        view = self._view.value
+        return view.categories if view is not None else {}
+
+    def current(self):
+        """当前的分区视图，尚未打开或已标记过期时先打开（必要时重建）"""
+        return self._view.get()
+
+    def mark_stale(self):
+        self._view.mark_stale()
+
+    def _current(self, manifest, store):
+        return manifest is not None and manifest.get("freq") == self.freq \
+            and manifest.get("store_generation") == store.meta["generation"]
+
+    def _open(self, store):
+        def load(manifest, gen_dir):
+            return {part["path"]: np.load(os.path.join(gen_dir, part["path"], "rows.npy"), mmap_mode="r")
+                    for part in manifest["partitions"]}
+
+        manifest, rows = open_generation(self.store_dir, MANIFEST_FILE, load)
+        return PartitionView(manifest, rows, store)
+
+    def _open_or_build(self, rebuild=False, attempts=3):
+        for _ in range(attempts):
+            # 固定列式存储的 generation，分区行号与读取的列始终来自同一份数据
+            store = open_submission_store(self.data_path).snapshot()
+            if rebuild or not self._current(read_json(os.path.join(self.store_dir, MANIFEST_FILE)), store):
+                with build_lock(self.store_dir):
+                    if rebuild or not self._current(read_json(os.path.join(self.store_dir, MANIFEST_FILE)), store):
+                        self._build_locked(store)
+            view = self._open(store)
+            # 其他进程恰好在此期间重建了列式存储和分区时，清单与固定的存储不匹配，重新打开
+            if self._current(view.manifest, store):
+                return view
+        raise RuntimeError(f"{self.store_dir} 在打开期间被反复重建")
+
+    def open_or_build(self):
+        """打开分区数据；不存在、列式存储已重建或分区粒度变化时，在文件锁内复查后重建"""
+        self._view.set(self._open_or_build())
+        return self
+
+    def build(self):
+        self._view.set(self._open_or_build(rebuild=True))
+        return self
+
+    def _build_locked(self, store):
+        """按整数班级编码和时间段对行号分组，每组写出一个行号文件"""
+        generation, gen_name, tmp_dir = new_generation(self.store_dir, MANIFEST_FILE)
+        try:
+            class_codes = np.asarray(store["class"], dtype=np.int64)
+            times = np.asarray(store["time"])
+            # 只对去重后的时间段格式化，时间段以起始日期命名（如按周时为该周周一）
+            period_codes, periods = pd.factorize(pd.to_datetime(times, unit="s").to_period(self.freq), sort=True)
+            period_names = periods.start_time.strftime("%Y-%m-%d").tolist()
+            # time 为 NaN 的记录编码为 -1，归入单独的时间段，而不是换算成 1970-01-01
+            if (period_codes < 0).any():
+                period_codes = np.where(period_codes < 0, len(period_names), period_codes)
+                period_names.append(UNKNOWN_PERIOD)
+            n_periods = len(period_names)
+            keys = class_codes * n_periods + period_codes
+            # 稳定排序后同一分区的行号连续且保持升序，读取时按顺序访问映射文件
+            order = np.argsort(keys, kind="stable")
+            bounds = np.concatenate([[0], np.cumsum(np.bincount(keys, minlength=len(store.categories["class"]) * n_periods))])
+
+            partitions = []
+            class_names = store.categories["class"]
+            for key in np.flatnonzero(np.diff(bounds)):
+                rows = order[bounds[key]:bounds[key + 1]]
+                class_name, period_key = class_names[key // n_periods], period_names[key % n_periods]
+                rel_path = f"class={class_name}/period={period_key}"
+                os.makedirs(os.path.join(tmp_dir, rel_path))
+                np.save(os.path.join(tmp_dir, rel_path, "rows.npy"), rows)
+                part_times = times[rows]
+                known = period_key != UNKNOWN_PERIOD
+                partitions.append({
+                    "path": rel_path,
+                    "class": class_name,
+                    "period": period_key,
+                    "rows": int(len(rows)),
+                    "min_time": float(part_times.min()) if known else None,
+                    "max_time": float(part_times.max()) if known else None,
+                    "students": np.unique(store["student_ID"][rows]).tolist(),
+                })
+
+            manifest = {
+                "generation": generation,
+                "path": gen_name,
+                "version": store.version,
+                "store_generation": store.meta["generation"],
+                "freq": self.freq,
+                "rows": sum(p["rows"] for p in partitions),
+                "partitions": partitions,
+            }
+            publish_generation(self.store_dir, tmp_dir, manifest, MANIFEST_FILE)
+        except BaseException:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+            raise
+
+    def prune(self, classes=None, start=None, end=None, students=None):
+        return self.current().prune(classes, start, end, students)
+
+    def read(self, columns=None, classes=None, start=None, end=None, students=None, categorical=False):
+        return self.current().read(columns, classes, start, end, students, categorical)
+
+
+def load_submit_records_pruned(data_path, columns=None, classes=None, start=None, end=None, students=None):
+    """按班级、时间范围或学生读取提交记录，只读取命中的分区"""
+    return PartitionedDataset(data_path).current().read(columns, classes, start, end, students)
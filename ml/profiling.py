@@ -0,0 +1,312 @@
+import os
+import sys
+import json
+import time
+import resource
+import threading
+import tracemalloc
+from collections import Counter
+from contextlib import contextmanager
+from functools import wraps
+
+# 设置后用 tracemalloc 统计每个阶段的内存峰值（会使字符串密集的阶段慢 2 倍左右）
+TRACE_MEMORY_ENV = "PIPELINE_TRACE_MEMORY"
+# 设置后在流程运行期间启用采样分析器，值为采样结果（折叠调用栈）的输出目录
+PROFILE_ENV = "PIPELINE_PROFILE"
+# 采样间隔（毫秒）
+PROFILE_INTERVAL_ENV = "PIPELINE_PROFILE_INTERVAL"
+
+_PAGE_SIZE = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+
+
+def _rows(value):
+    """DataFrame、数组、列表等对象的行数，无法确定时返回 None"""
+    if value is None:
+        return None
+    if hasattr(value, "shape") and len(value.shape) > 0:
+        return int(value.shape[0])
+    if isinstance(value, (list, tuple, dict)):
+        return len(value)
+    return None
+
+
+def current_rss():
+    """当前常驻内存（字节），不支持时返回 None"""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * _PAGE_SIZE
+    except (OSError, IndexError, ValueError):
+        return None
+
+
+def _max_rss():
+    """进程常驻内存的历史峰值（字节）"""
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+class Span:
+    """一次阶段执行的记录"""
+
+    __slots__ = ("name", "category", "tid", "depth", "start", "end", "cpu_start", "cpu",
+                 "rows_in", "rows_out", "mem_start", "peak", "child_peak", "max_rss_start", "max_rss_growth", "rss")
+
+    def __init__(self, name, category, tid, depth):
+        self.name = name
+        self.category = category
+        self.tid = tid
+        self.depth = depth
+        self.rows_in = None
+        self.rows_out = None
+        self.mem_start = 0
+        self.peak = None
+        self.child_peak = 0
+        self.max_rss_growth = 0
+        self.rss = None
+
+    @property
+    def duration(self):
+        return self.end - self.start
+
+    def to_dict(self):
+        return {
+            "name": self.name,
+            "category": self.category,
+            "depth": self.depth,
+            "wall_sec": round(self.duration, 6),
+            "cpu_sec": round(self.cpu, 6),
+            "rows_in": self.rows_in,
+            "rows_out": self.rows_out,
+            "peak_mb": round(self.peak / 1024 / 1024, 2) if self.peak is not None else None,
+            "max_rss_growth_mb": round(self.max_rss_growth / 1024 / 1024, 2),
+            "rss_mb": round(self.rss / 1024 / 1024, 2) if self.rss is not None else None,
+        }
+
+
+class Tracer:
+    """记录流程各阶段的耗时、CPU 时间、内存与行数，支持嵌套
+
+    导出 Chrome Trace Event 格式（可用 Perfetto / chrome://tracing 打开）；
+    设置 PIPELINE_PROFILE 时在最外层阶段运行期间启用采样分析器，
+    调用栈前缀为当前所在的阶段名，便于在火焰图中定位变慢的阶段。
+    """
+
+    def __init__(self):
+        self.epoch = time.perf_counter()
+        self.spans = []
+        self.samples = Counter()
+        self._stacks = {}               # 线程 ID -> 正在执行的阶段栈
+        self._lock = threading.Lock()
+        self._sampler = None
+        self._sampler_stop = None
+        self._owns_tracemalloc = False
+
+    @property
+    def trace_memory(self):
+        return bool(os.environ.get(TRACE_MEMORY_ENV))
+
+    def reset(self):
+        with self._lock:
+            self.epoch = time.perf_counter()
+            self.spans = []
+            self.samples = Counter()
+
+    def active(self):
+        """当前线程是否处在一次流程追踪（已打开的最外层阶段）之中"""
+        return bool(self._stacks.get(threading.get_ident()))
+
+    @contextmanager
+    def span(self, name, category="pipeline", rows_in=None):
+        """记录一个阶段；返回的 Span 可在块内设置 rows_out"""
+        tid = threading.get_ident()
+        stack = self._stacks.setdefault(tid, [])
+        if not stack:
+            self._start_root()
+        span = Span(name, category, tid, len(stack))
+        span.rows_in = rows_in
+
+        if tracemalloc.is_tracing():
+            current, peak = tracemalloc.get_traced_memory()
+            if stack:
+                stack[-1].child_peak = max(stack[-1].child_peak, peak - stack[-1].mem_start)
+            tracemalloc.reset_peak()
+            span.mem_start = current
+        span.max_rss_start = _max_rss()
+        stack.append(span)
+        span.cpu_start = time.process_time()
+        span.start = time.perf_counter()
+        try:
+            yield span
+        finally:
+            span.end = time.perf_counter()
+            span.cpu = time.process_time() - span.cpu_start
+            stack.pop()
+            if tracemalloc.is_tracing():
+                _, peak = tracemalloc.get_traced_memory()
+                span.peak = max(peak - span.mem_start, span.child_peak)
+                if stack:
+                    stack[-1].child_peak = max(stack[-1].child_peak, span.peak + span.mem_start - stack[-1].mem_start)
+            span.max_rss_growth = _max_rss() - span.max_rss_start
+            span.rss = current_rss()
+            with self._lock:
+                self.spans.append(span)
+            if not stack:
+                del self._stacks[tid]
+                self._stop_root()
+
+    def _start_root(self):
+        """最外层阶段开始：按环境变量开启内存追踪与采样分析"""
+        if self.trace_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._owns_tracemalloc = True
+        if os.environ.get(PROFILE_ENV) and self._sampler is None:
+            interval = float(os.environ.get(PROFILE_INTERVAL_ENV, 5)) / 1000
+            self._sampler_stop = threading.Event()
+            self._sampler = threading.Thread(target=self._sample_loop, args=(interval,),
+                                             name="pipeline-sampler", daemon=True)
+            self._sampler.start()
+
+    def _stop_root(self):
+        if self._stacks:
+            return
+        if self._owns_tracemalloc:
+            tracemalloc.stop()
+            self._owns_tracemalloc = False
+        if self._sampler is not None:
+            self._sampler_stop.set()
+            self._sampler.join()
+            self._sampler = None
+
+    def _sample_loop(self, interval):
+        """定时采集正在执行阶段的线程调用栈，累计为折叠栈计数"""
+        while not self._sampler_stop.wait(interval):
+            frames = sys._current_frames()
+            for tid, stack in list(self._stacks.items()):
+                frame = frames.get(tid)
+                if frame is None or not stack:
+                    continue
+                calls = []
+                while frame is not None:
+                    code = frame.f_code
+                    calls.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                    frame = frame.f_back
+                key = ";".join([f"[{span.name}]" for span in list(stack)] + calls[::-1])
+                with self._lock:
+                    self.samples[key] += 1
+
+    def summary(self):
+        """按完成顺序返回各阶段记录"""
+        with self._lock:
+            return [span.to_dict() for span in self.spans]
+
+    def last_durations(self, category=None):
+        """各阶段最近一次的耗时（秒）"""
+        durations = {}
+        with self._lock:
+            for span in self.spans:
+                if category is None or span.category == category:
+                    durations[span.name] = span.duration
+        return durations
+
+    def chrome_trace(self):
+        """Chrome Trace Event 格式的数据"""
+        pid = os.getpid()
+        with self._lock:
+            events = [{
+                "name": span.name,
+                "cat": span.category,
+                "ph": "X",
+                "ts": round((span.start - self.epoch) * 1e6, 1),
+                "dur": round(span.duration * 1e6, 1),
+                "pid": pid,
+                "tid": span.tid,
+                "args": {k: v for k, v in span.to_dict().items() if k not in ("name", "category", "depth")},
+            } for span in self.spans]
+        return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+    def write_trace(self, path, keep_previous=False):
+        """导出 Chrome Trace Event JSON 文件
+
+        keep_previous 为 True 时（只重新生成了部分图表）保留原文件中本次没有运行的阶段，
+        读取追踪文件的 /metrics 等仍能看到其余图表最近一次的耗时。
+        """
+        trace = self.chrome_trace()
+        if keep_previous and os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                previous = json.load(f)["traceEvents"]
+            names = {event["name"] for event in trace["traceEvents"]}
+            trace["traceEvents"] = [e for e in previous if e["name"] not in names] + trace["traceEvents"]
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(trace, f, ensure_ascii=False)
+        os.replace(tmp_path, path)
+        return path
+
+    def write_profile(self, output_dir=None):
+        """将采样结果写为折叠调用栈文件（可用 speedscope / flamegraph.pl 打开），没有采样时返回 None"""
+        output_dir = output_dir or os.environ.get(PROFILE_ENV)
+        with self._lock:
+            samples = dict(self.samples)
+        if not samples or not output_dir:
+            return None
+        os.makedirs(output_dir, exist_ok=True)
+        path = os.path.join(output_dir, f"pipeline-{time.strftime('%Y%m%d-%H%M%S')}-{os.getpid()}.folded")
+        with open(path, "w", encoding="utf-8") as f:
+            for stack, count in sorted(samples.items()):
+                f.write(f"{stack} {count}\n")
+        return path
+
+    def format_summary(self):
+        """阶段耗时表格，按嵌套层级缩进
+
+        内存列在启用 tracemalloc 时为阶段内的分配峰值；否则只能给出进程最大常驻内存（ru_maxrss）
+        在该阶段内的增长，未超过此前最高水位的阶段为 0，表头会相应注明。
+        """
+        spans = sorted(self.summary_spans(), key=lambda s: s.start)
+        traced = bool(spans) and all(span.peak is not None for span in spans)
+        memory_header = "分配峰值(MB)" if traced else "maxRSS增长(MB)"
+        lines = [f"{'阶段':<60}{'耗时(s)':>10}{'CPU(s)':>10}{'输入行':>10}{'输出行':>10}{memory_header:>14}"]
+        for span in spans:
+            memory = span.peak if traced else span.max_rss_growth
+            lines.append(f"{'  ' * span.depth + span.name:<60}{span.duration:>10.3f}{span.cpu:>10.3f}"
+                         f"{span.rows_in if span.rows_in is not None else '-':>10}"
+                         f"{span.rows_out if span.rows_out is not None else '-':>10}"
+                         f"{memory / 1024 / 1024:>14.1f}")
+        if not traced:
+            lines.append(f"（maxRSS增长为进程常驻内存最高水位的增长，不是阶段自身的内存峰值；"
+                         f"设置 {TRACE_MEMORY_ENV}=1 可统计各阶段的分配峰值）")
+        return "\n".join(lines)
+
+    def summary_spans(self):
+        with self._lock:
+            return list(self.spans)
+
+
+tracer = Tracer()
+
+
+def trace_span(name, category="pipeline", rows_in=None):
+    """上下文管理器形式：with trace_span("radar"): ...，在最外层使用时开启一次流程追踪"""
+    return tracer.span(name, category, rows_in=rows_in)
+
+
+def trace_stage(rows_in=None, rows_out=None, name=None):
+    """可视化类阶段方法的装饰器
+
+    rows_in / rows_out 为实例属性名，分别在阶段执行前后读取其行数；
+    未指定 rows_out 时使用返回值的行数。阶段名默认为“类名.方法名”。
+    只在流程追踪进行中（外层已有 trace_span，如 generate_visualizations）记录，
+    服务端查询接口调用这些方法时直接执行，不会在常驻进程中不断累积阶段记录。
+    """
+    def decorator(func):
+        @wraps(func)
+        def wrapper(self, *args, **kwargs):
+            if not tracer.active():
+                return func(self, *args, **kwargs)
+            cls = type(self).__name__
+            with tracer.span(name or f"{cls}.{func.__name__}", category=cls,
+                             rows_in=_rows(getattr(self, rows_in, None)) if rows_in else None) as span:
+                result = func(self, *args, **kwargs)
+                span.rows_out = _rows(getattr(self, rows_out, None)) if rows_out else _rows(result)
+            return result
+        return wrapper
+    return decorator
@@ -1,19 +1,34 @@
 import os
-import glob
 import pandas as pd
 import numpy as np
 from pyecharts.charts import Radar
 from pyecharts import options as opts
 from pyecharts.globals import ThemeType
+from .profiling import trace_stage
+from .columnar_store import load_submit_frame
+from .partitions import load_submit_records_pruned
+
+# 雷达图的五个指标列（按坐标轴顺序）
+RADAR_COLUMNS = ["avg_score", "accuracy", "avg_time_sec", "avg_submissions", "total_submissions"]
 
 class ClassRadarVisualizer:
-    def __init__(self, data_path):
+    def __init__(self, data_path, classes=None, start=None, end=None, submit_df=None, scale=None):
         self.data_path = data_path
+        # 可选的班级和时间范围 [start, end)，指定后只读取命中的分区
+        self.classes = classes
+        self.start = start
+        self.end = end
+        # 归一化基准（指标名 -> 最大值），默认取当前数据中各指标的最大值；
+        # 只含一个班级时可传入全体班级的最大值，使单班雷达图可与其他班级比较
+        self.scale = scale
         self.student_df = None
         self.title_df = None
-        self.submit_df = None
+        # 已传入的提交记录（如按班级批量导出时的班级切片）直接使用，不再读取文件
+        self.submit_df = submit_df
         self.grouped_class = None
+        self.chart = None
 
+    @trace_stage(rows_out="submit_df")
     def load_data(self):
         """加载数据"""
         # 加载学生信息和题目信息
@@ -22,14 +37,18 @@ class ClassRadarVisualizer:
         self.student_df = pd.read_csv(student_info_path)
         self.title_df = pd.read_csv(title_info_path)
 
-        # 加载所有班级的提交记录
-        submitrecord_paths = glob.glob(os.path.join(self.data_path, "SubmitRecord-Class*.csv"))
-        submit_df_list = []
-        for path in submitrecord_paths:
-            temp_df = pd.read_csv(path)
-            submit_df_list.append(temp_df)
-        self.submit_df = pd.concat(submit_df_list, ignore_index=True)
+        if self.submit_df is not None:
+            return
+
+        if self.classes or self.start is not None or self.end is not None:
+            self.submit_df = load_submit_records_pruned(
+                self.data_path, classes=self.classes, start=self.start, end=self.end)
+            return
 
+        # 从共享的列式存储读取所有班级的提交记录
+        self.submit_df = load_submit_frame(self.data_path)
+
+    @trace_stage(rows_in="submit_df", rows_out="submit_df")
     def preprocess_data(self):
         """数据预处理"""
         # 判断答题是否完全正确
@@ -40,6 +59,7 @@ class ClassRadarVisualizer:
         # 将答题用时从毫秒转换为秒
         self.submit_df["time_sec"] = self.submit_df["timeconsume"] / 1000.0
 
+    @trace_stage(rows_in="submit_df", rows_out="grouped_class")
     def aggregate_data(self):
         """按班级聚合数据"""
         grouped_class = self.submit_df.groupby("class").agg(
@@ -54,14 +74,18 @@ class ClassRadarVisualizer:
         grouped_class["avg_submissions"] = grouped_class["total_submissions"] / grouped_class["unique_students"]
         self.grouped_class = grouped_class
 
+    @trace_stage(rows_in="grouped_class", rows_out="grouped_class")
     def normalize_data(self):
         """对指标进行归一化处理"""
-        self.grouped_class["norm_avg_score"] = self.grouped_class["avg_score"] / self.grouped_class["avg_score"].max()
-        self.grouped_class["norm_accuracy"] = self.grouped_class["accuracy"] / self.grouped_class["accuracy"].max()
-        self.grouped_class["norm_avg_time_sec"] = self.grouped_class["avg_time_sec"] / self.grouped_class["avg_time_sec"].max()
-        self.grouped_class["norm_avg_submissions"] = self.grouped_class["avg_submissions"] / self.grouped_class["avg_submissions"].max()
-        self.grouped_class["norm_total_submissions"] = self.grouped_class["total_submissions"] / self.grouped_class["total_submissions"].max()
+        scale = self.scale or self.metric_max()
+        for column in RADAR_COLUMNS:
+            self.grouped_class[f"norm_{column}"] = self.grouped_class[column] / scale[column]
+
+    def metric_max(self):
+        """各指标在已聚合班级中的最大值（可作为其他雷达图的归一化基准）"""
+        return {column: float(self.grouped_class[column].max()) for column in RADAR_COLUMNS}
 
+    @trace_stage(rows_in="grouped_class")
     def create_radar_chart(self, output_path=None):
         """创建雷达图"""
         if output_path is None:
@@ -127,9 +151,11 @@ class ClassRadarVisualizer:
         )
 
         # 保存雷达图
+        self.chart = radar
         radar.render(output_path)
         print(f"Radar chart saved to: {output_path}")
 
+    @trace_stage()
     def visualize(self, output_path=None):
         """执行整个可视化流程"""
         self.load_data()
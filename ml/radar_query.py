@@ -0,0 +1,219 @@
+from functools import lru_cache
+import pandas as pd
+from .dataset import load_student_info
+from .columnar_store import open_submission_store
+from .partitions import PartitionedDataset, to_timestamp
+from .profiling import trace_stage
+from .reloadable import Reloadable
+
+# 雷达图五个指标：(字段名, 显示名称)
+RADAR_METRICS = [
+    ("avg_score", "平均得分"),
+    ("accuracy", "准确率"),
+    ("avg_time_sec", "平均答题时长"),
+    ("avg_submissions", "人均提交数"),
+    ("total_submissions", "总提交数"),
+]
+
+# 支持的分组方式，"students" 表示显式给出的学生名单
+GROUP_FIELDS = ("class", "major", "sex", "age_band", "students")
+
+AGE_BINS = [0, 19, 21, 23, 200]
+AGE_LABELS = ["18-19", "20-21", "22-23", "24+"]
+
+
+class RadarTables:
+    """一次预计算得到的分组汇总表，构建后不再修改，重建时整体替换"""
+
+    def __init__(self, version, class_student, student, attrs):
+        self.version = version
+        self.class_student = class_student  # 以 (class, student_ID) 为粒度的汇总
+        self.student = student              # 以 student_ID 为粒度的汇总（含学生属性）
+        self.attrs = attrs                  # 学生属性（含年龄段）
+
+
+class GroupRadarQuery:
+    """任意分组的雷达图指标查询
+
+    预先按 (班级, 学生) 汇总提交次数、得分和、正确数和答题时长和，
+    五个指标均可由这些和与计数重新组合得到，查询时无需再扫描原始提交记录。
+    指定时间范围的查询从分区数据中只读取命中的班级与时间段，再按同样方式汇总。
+    数据变化后调用 invalidate()，下一次查询在锁内重建汇总表，其余查询在此期间仍使用旧表。
+    """
+
+    def __init__(self, data_path, cache_size=256, partitions=None):
+        self.data_path = data_path
+        self.cache_size = cache_size
+        self.partitions = partitions or PartitionedDataset(data_path)
+        self._tables = Reloadable(self._load_tables)
+        self._compare_cached = lru_cache(maxsize=cache_size)(self._compare)
+
+    @property
+    def version(self):
+        tables = self._tables.value
+        return tables.version if tables is not None else None
+
+    @property
+    def class_student(self):
+        tables = self._tables.value
+        return tables.class_student if tables is not None else None
+
+    @property
+    def student(self):
+        tables = self._tables.value
+        return tables.student if tables is not None else None
+
+    @trace_stage()
+    def build(self, submit_df=None, student_df=None):
+        """预计算分组汇总表并替换当前的汇总表"""
+        self._tables.set(self._load_tables(submit_df, student_df))
+        return self
+
+    def invalidate(self):
+        """标记汇总表和分区过期，下一次查询时重建"""
+        self.partitions.mark_stale()
+        self._tables.mark_stale()
+
+    def _load_tables(self, submit_df=None, student_df=None):
+        store = open_submission_store(self.data_path).snapshot()
+        if submit_df is None:
+            # 直接引用内存映射的列，不复制原始数据
+            submit_df = store.to_frame(["class", "student_ID", "state", "score", "timeconsume"])
+        if student_df is None:
+            student_df = load_student_info(self.data_path)
+
+        attrs = student_df[["student_ID", "sex", "age", "major"]].copy()
+        attrs["age_band"] = pd.cut(attrs["age"], bins=AGE_BINS, labels=AGE_LABELS).astype(str)
+        class_student, student = self._aggregate(submit_df, attrs)
+        # 旧表的查询结果不再有用，缓存键中含汇总表本身，清空只是为了释放内存
+        self._compare_cached.cache_clear()
+        return RadarTables(store.version, class_student, student, attrs)
+
+    def _aggregate(self, submit_df, attrs):
+        """汇总为 (班级, 学生) 与学生两个粒度的表"""
+        submit_df = submit_df.assign(
+            is_correct=submit_df["state"].astype(str).str.contains("Absolutely_Correct", regex=False).astype(int),
+            time_sec=submit_df["timeconsume"] / 1000.0,
+        )
+        class_student = submit_df.groupby(["class", "student_ID"], observed=True).agg(
+            submissions=("score", "size"),
+            score_sum=("score", "sum"),
+            score_count=("score", "count"),
+            correct_sum=("is_correct", "sum"),
+            time_sum=("time_sec", "sum"),
+            time_count=("time_sec", "count"),
+        ).reset_index()
+
+        class_student["student_ID"] = class_student["student_ID"].astype(str)
+        student = class_student.groupby("student_ID").agg(
+            submissions=("submissions", "sum"),
+            score_sum=("score_sum", "sum"),
+            score_count=("score_count", "sum"),
+            correct_sum=("correct_sum", "sum"),
+            time_sum=("time_sum", "sum"),
+            time_count=("time_count", "sum"),
+        ).reset_index()
+        return class_student, student.merge(attrs, on="student_ID", how="left").set_index("student_ID")
+
+    def _window_tables(self, tables, group_by, key, start, end):
+        """按时间范围（及要比较的班级）裁剪分区后重新汇总"""
+        classes = list(key) if group_by == "class" and key else None
+        students = [sid for _, ids in key for sid in ids] if group_by == "students" else None
+        submit_df = self.partitions.current().read(["class", "student_ID", "state", "score", "timeconsume"],
+                                                   classes=classes, start=start, end=end, students=students,
+                                                   categorical=True)
+        return self._aggregate(submit_df, tables.attrs)
+
+    def compare(self, group_by="class", groups=None, start=None, end=None):
+        """返回各分组的五项指标及按分组间最大值归一化后的结果
+
+        group_by 为 "students" 时，groups 为 {分组名: [student_ID, ...]}；
+        否则 groups 为可选的分组取值列表，用于只比较其中几个分组。
+        start / end 为可选的时间范围 [start, end)（Unix 时间戳或日期字符串）。
+        """
+        key = self._group_key(group_by, groups)
+        start, end = to_timestamp(start), to_timestamp(end)
+        return self._compare_cached(self._tables.get(), group_by, key, start, end)
+
+    @staticmethod
+    def _group_key(group_by, groups):
+        """校验分组参数并转换为可哈希的缓存键，格式不符时抛出 ValueError"""
+        if group_by not in GROUP_FIELDS:
+            raise ValueError(f"不支持的分组方式: {group_by}，可选: {', '.join(GROUP_FIELDS)}")
+        if group_by == "students":
+            if not isinstance(groups, dict) or not groups:
+                raise ValueError("按学生名单分组时 groups 必须为 {分组名: [student_ID, ...]}")
+            for name, ids in groups.items():
+                if not isinstance(ids, list) or not all(isinstance(i, str) for i in ids):
+                    raise ValueError(f"分组 {name} 的学生名单必须为 student_ID 字符串列表")
+            return tuple(sorted((str(name), tuple(sorted(ids))) for name, ids in groups.items()))
+        if groups is None:
+            return None
+        if not isinstance(groups, (list, tuple)) or not all(isinstance(g, str) for g in groups):
+            raise ValueError("groups 必须为分组取值（字符串）的列表")
+        return tuple(sorted(groups)) or None
+
+    def cache_info(self):
+        return self._compare_cached.cache_info()
+
+    def _compare(self, tables, group_by, key, start=None, end=None):
+        if start is None and end is None:
+            class_student, student = tables.class_student, tables.student
+        else:
+            class_student, student = self._window_tables(tables, group_by, key, start, end)
+
+        if group_by == "students":
+            frames = []
+            for name, ids in key:
+                members = student.reindex(list(ids)).dropna(subset=["submissions"])
+                frames.append(members.assign(group=name))
+            base = pd.concat(frames) if frames else student.iloc[0:0].assign(group=None)
+        elif group_by == "class":
+            base = class_student.assign(group=class_student["class"].astype(str))
+        else:
+            base = student.assign(group=student[group_by].astype(str))
+
+        if key is not None and group_by != "students":
+            base = base[base["group"].isin(key)]
+
+        grouped = base.groupby("group").agg(
+            total_submissions=("submissions", "sum"),
+            score_sum=("score_sum", "sum"),
+            score_count=("score_count", "sum"),
+            correct_sum=("correct_sum", "sum"),
+            time_sum=("time_sum", "sum"),
+            time_count=("time_count", "sum"),
+            unique_students=("submissions", "size"),
+        )
+        # 得分和答题时长缺失的记录只计入提交数，不参与平均
+        grouped["avg_score"] = grouped["score_sum"] / grouped["score_count"]
+        grouped["accuracy"] = grouped["correct_sum"] / grouped["total_submissions"]
+        grouped["avg_time_sec"] = grouped["time_sum"] / grouped["time_count"]
+        grouped["avg_submissions"] = grouped["total_submissions"] / grouped["unique_students"]
+
+        metrics = [name for name, _ in RADAR_METRICS]
+        maxima = grouped[metrics].max()
+        normalized = grouped[metrics] / maxima.where(maxima > 0, 1)
+
+        if group_by == "class":
+            # 班级按编号自然排序 (Class1, Class2 ... Class10)
+            order = sorted(grouped.index, key=lambda x: int(''.join(filter(str.isdigit, x)) or 0))
+        else:
+            order = sorted(grouped.index)
+
+        return {
+            "group_by": group_by,
+            "start": start,
+            "end": end,
+            "data_version": tables.version,
+            "indicators": [{"name": label, "max": 1} for _, label in RADAR_METRICS],
+            "groups": [
+                {
+                    "name": name,
+                    "unique_students": int(grouped.at[name, "unique_students"]),
+                    "raw": {m: float(grouped.at[name, m]) for m in metrics},
+                    "normalized": [round(float(normalized.at[name, m]), 6) for m in metrics],
+                }
+                for name in order
+            ],
+        }
@@ -0,0 +1,72 @@
+import os
+import argparse
+import importlib
+
+import pandas as pd
+
+from .chart_export import CHARTS, write_chart_json
+from .dataset import load_student_info, load_title_info, data_version
+
+# 图表名称 -> (模块, 可视化类)；模块在首次使用时才导入，避免加载用不到的 xgboost、sklearn 等依赖
+VISUALIZERS = {
+    "heatmap": ("ml.knowledge_heatmap", "DataVisualizer"),
+    "radar": ("ml.radar_chart", "ClassRadarVisualizer"),
+    "clusters": ("ml._3d_scatter", "StudentBehaviorClusterVisualizer"),
+    "xgboost": ("ml.Xgboost", "XGBoostModelVisualizer"),
+    "network": ("ml.network", "NetworkGraphVisualizer"),
+    "timeline": ("ml.timeline", "TimelineVisualizer"),
+}
+
+
+def available_charts():
+    """全部图表名称（按生成顺序）"""
+    return list(VISUALIZERS)
+
+
+def get_visualizer(name):
+    """返回图表对应的可视化类，按需导入其模块"""
+    if name not in VISUALIZERS:
+        raise KeyError(f"未知图表 {name}，可选: {', '.join(VISUALIZERS)}")
+    module_name, class_name = VISUALIZERS[name]
+    return getattr(importlib.import_module(module_name), class_name)
+
+
+def create_visualizer(name, data_path):
+    """创建图表的可视化对象；热力图需要预先加载学生与题目信息"""
+    visualizer_cls = get_visualizer(name)
+    if name == "heatmap":
+        return visualizer_cls(load_student_info(data_path), load_title_info(data_path), pd.DataFrame(), data_path)
+    return visualizer_cls(data_path)
+
+
+def render_chart(name, data_path, result_dir, version=None):
+    """生成单个图表的 HTML 页面与 JSON 数据，返回 HTML 路径"""
+    os.makedirs(result_dir, exist_ok=True)
+    output_path = os.path.join(result_dir, CHARTS[name])
+    visualizer = create_visualizer(name, data_path)
+    visualizer.visualize(output_path=output_path)
+    if not os.path.exists(output_path):
+        raise FileNotFoundError(f"文件 {output_path} 未生成，请检查代码逻辑。")
+    write_chart_json(visualizer.chart, result_dir, name, version or data_version(data_path))
+    return output_path
+
+
+def main():
+    parser = argparse.ArgumentParser(description="生成指定的图表（只导入所需的可视化模块）")
+    parser.add_argument("charts", nargs="*", help=f"图表名称（{', '.join(VISUALIZERS)}），默认全部")
+    parser.add_argument("--data", default="data", help="数据目录")
+    parser.add_argument("--output", default="results", help="输出目录")
+    args = parser.parse_args()
+    unknown = [name for name in args.charts if name not in VISUALIZERS]
+    if unknown:
+        parser.error(f"未知图表: {', '.join(unknown)}")
+
+    from .assets import prepare_local_assets
+    prepare_local_assets(args.output)
+    version = data_version(args.data)
+    for name in args.charts or available_charts():
+        print(f"{name}: {render_chart(name, args.data, args.output, version)}")
+
+
+if __name__ == "__main__":
+    main()
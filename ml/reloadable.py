@@ -0,0 +1,41 @@
+import threading
+
+
+class Reloadable:
+    """持有一份预计算结果（汇总表、索引视图、分区清单等）的引用，过期时在锁内重新构建后整体替换
+
+    查询线程通过 get() 取得一份完整的结果后只使用这一份，重建期间旧结果仍然可用；
+    数据变化时只调用 mark_stale() 标记过期，从不把正在使用的结果置为 None。
+    多个线程同时发现结果过期时只有一个线程重建，其余线程等锁后直接使用新结果。
+    """
+
+    def __init__(self, load):
+        self._load = load
+        self.value = None
+        self._stale = False
+        self._lock = threading.Lock()
+
+    def get(self):
+        value = self.value
+        if value is not None and not self._stale:
+            return value
+        with self._lock:
+            if self.value is None or self._stale:
+                # 先清除标记：重建期间再次标记的过期不会被这次重建吞掉
+                self._stale = False
+                try:
+                    self.value = self._load()
+                except BaseException:
+                    self._stale = True
+                    raise
+            return self.value
+
+    def set(self, value):
+        """直接替换为已构建好的结果"""
+        with self._lock:
+            self.value = value
+            self._stale = False
+        return value
+
+    def mark_stale(self):
+        self._stale = True
@@ -0,0 +1,187 @@
+import os
+import numpy as np
+import pandas as pd
+from .dataset import load_title_info, data_version
+from .columnar_store import ColumnarStore, load_submit_frame
+from .profiling import trace_stage
+from .reloadable import Reloadable
+
+
+class StudentIndex:
+    """按 (student_ID, time) 排序的提交记录索引
+
+    提交记录取自共享的提交记录列式存储（不再重新读取各班级 CSV），只排序一次后写入索引自己的存储，
+    学生 -> (offset, length) 表与各列写入同一 generation；
+    查询时以内存映射方式打开，二分查找学生后直接切片，无需扫描各班级文件。
+    重建在存储的文件锁内进行，多个工作进程同时发现数据变化时只重建一次。
+    打开的索引保存为一个 IndexView，数据变化后调用 mark_stale()，下一次查询在锁内重新打开并整体替换。
+    """
+
+    def __init__(self, data_path, index_dir=None):
+        self.data_path = data_path
+        self.index_dir = index_dir or os.path.join(data_path, "cache", "student_index")
+        self.store = ColumnarStore(os.path.join(self.index_dir, "index"))
+        self._view = Reloadable(self._open_or_build)
+
+    @property
+    def meta(self):
+        view = self._view.value
+        return view.meta if view is not None else None
+
+    def current(self):
+        """当前的索引视图，尚未打开或已标记过期时先打开（必要时重建）"""
+        return self._view.get()
+
+    def mark_stale(self):
+        self._view.mark_stale()
+
+    def _derive(self, title_df=None):
+        """返回写入存储时计算学生表、聚类和题目知识点的函数"""
+        def derive(submit_df, codes, categories):
+            titles = title_df if title_df is not None else load_title_info(self.data_path)
+            # 学生编号的字典按字典序排列，编码顺序即学生表顺序
+            student_ids = categories["student_ID"]
+            title_ids = categories["title_ID"]
+
+            # 学生 -> (offset, length)
+            lengths = np.bincount(codes["student_ID"], minlength=len(student_ids)).astype(np.int64)
+            offsets = np.concatenate([[0], np.cumsum(lengths)[:-1]]).astype(np.int64)
+
+            # 题目编码 -> 知识点列表（一道题可能对应多个知识点），用于按知识点汇总得分
+            title_groups = titles.dropna(subset=["knowledge"]).groupby("title_ID")
+            knowledge_map = title_groups["knowledge"].agg(lambda s: sorted(set(s.astype(str))))
+            full_score = title_groups["score"].first()
+            arrays = {
+                "students": np.asarray(student_ids),
+                "offsets": offsets,
+                "lengths": lengths,
+                "clusters": self._student_clusters(submit_df, student_ids),
+            }
+            attrs = {
+                "title_knowledge": [knowledge_map.get(t, []) for t in title_ids],
+                "title_full_score": [float(full_score.get(t, 0)) for t in title_ids],
+            }
+            return arrays, attrs
+        return derive
+
+    @trace_stage()
+    def build(self, submit_df=None, title_df=None):
+        """排序并写出索引文件"""
+        if submit_df is None:
+            submit_df = load_submit_frame(self.data_path)
+        self.store.write(submit_df, sort_by=["student_ID", "time"], version=data_version(self.data_path),
+                         extra=self._derive(title_df))
+        return self.open()
+
+    def _student_clusters(self, submit_df, student_ids):
+        """沿用 3D 聚类图的特征和参数为每个学生计算所属聚类"""
+        from ._3d_scatter import StudentBehaviorClusterVisualizer
+        cluster_visualizer = StudentBehaviorClusterVisualizer(self.data_path, submit_df=submit_df.copy())
+        cluster_visualizer.preprocess_data()
+        cluster_visualizer.aggregate_features()
+        cluster_visualizer.perform_clustering()
+        clusters = cluster_visualizer.features.set_index("student_ID")["cluster"]
+        return clusters.reindex(student_ids).fillna(-1).to_numpy(dtype=np.int16)
+
+    def open(self):
+        """以内存映射方式打开索引"""
+        self.store.open()
+        self._view.set(IndexView(self.store.snapshot()))
+        return self
+
+    def _open_or_build(self):
+        self.store.open_or_write(data_version(self.data_path), lambda: load_submit_frame(self.data_path),
+                                 sort_by=["student_ID", "time"], extra=self._derive())
+        return IndexView(self.store.snapshot())
+
+    def open_or_build(self):
+        """索引存在且与当前数据版本一致时直接打开，否则在文件锁内复查后重建"""
+        self._view.set(self._open_or_build())
+        return self
+
+    def student_detail(self, student_id):
+        """返回学生的完整提交历史、按知识点汇总的得分和所属聚类"""
+        return self.current().student_detail(student_id)
+
+
+class IndexView:
+    """打开后的一份学生索引，固定在存储的一个 generation 上，之后不再变化"""
+
+    def __init__(self, store):
+        self.store = store
+        self.meta = {"version": store.version, "rows": len(store), **store.meta["attrs"]}
+        self.students = store.arrays["students"]
+        self.offsets = store.arrays["offsets"]
+        self.lengths = store.arrays["lengths"]
+        self.clusters = store.arrays["clusters"]
+
+    def locate(self, student_id):
+        """二分查找学生，返回其记录区间 (offset, length)，不存在时返回 None"""
+        pos = int(np.searchsorted(self.students, student_id))
+        if pos >= len(self.students) or self.students[pos] != student_id:
+            return None
+        return pos, int(self.offsets[pos]), int(self.lengths[pos])
+
+    def student_detail(self, student_id):
+        """返回学生的完整提交历史、按知识点汇总的得分和所属聚类"""
+        located = self.locate(student_id)
+        if located is None:
+            return None
+        pos, offset, length = located
+        rows = {name: np.asarray(col[offset:offset + length]) for name, col in self.store.columns.items()}
+        categories = self.store.categories
+
+        history = [
+            {
+                "time": _number(rows["time"][i], float),
+                "class": categories["class"][rows["class"][i]],
+                "title_ID": categories["title_ID"][rows["title_ID"][i]],
+                "state": categories["state"][rows["state"][i]],
+                "method": categories["method"][rows["method"][i]],
+                "score": _number(rows["score"][i], int),
+                "memory": _number(rows["memory"][i], int),
+                "timeconsume": _number(rows["timeconsume"][i], float),
+            }
+            for i in range(length)
+        ]
+
+        # 按知识点汇总：提交次数、平均得分、得分率（相对题目满分）
+        title_knowledge = self.meta["title_knowledge"]
+        full_score = np.asarray(self.meta["title_full_score"])[rows["title_ID"]]
+        per_knowledge = (
+            pd.DataFrame({
+                "knowledge": [title_knowledge[t] for t in rows["title_ID"]],
+                "score": rows["score"],
+                # 得分缺失的提交不计入满分和，得分率只按有得分的提交计算
+                "full_score": np.where(np.isnan(rows["score"]), np.nan, full_score),
+            })
+            .explode("knowledge")
+            .dropna(subset=["knowledge"])
+            .groupby("knowledge")
+            .agg(submissions=("score", "size"), avg_score=("score", "mean"),
+                 score_sum=("score", "sum"), full_score_sum=("full_score", "sum"))
+        )
+        per_knowledge["score_rate"] = per_knowledge["score_sum"] / per_knowledge["full_score_sum"].where(
+            per_knowledge["full_score_sum"] > 0)
+
+        return {
+            "student_ID": student_id,
+            "data_version": self.meta["version"],
+            "cluster": int(self.clusters[pos]),
+            "submissions": length,
+            "knowledge_scores": [
+                {
+                    "knowledge": name,
+                    "submissions": int(row["submissions"]),
+                    "avg_score": None if pd.isna(row["avg_score"]) else float(row["avg_score"]),
+                    "score_rate": None if pd.isna(row["score_rate"]) else float(row["score_rate"]),
+                }
+                for name, row in per_knowledge.iterrows()
+            ],
+            "history": history,
+        }
+
+
+def _number(value, cast):
+    """存储中的数值（缺失为 NaN）转换为 JSON 可表示的值，缺失时为 None"""
+    return None if np.isnan(value) else cast(value)
@@ -0,0 +1,184 @@
+import os
+import string
+import argparse
+import numpy as np
+import pandas as pd
+
+# 与真实数据接近的分布（取自 data/ 目录下的提交记录）
+STATE_PROBS = {
+    "Absolutely_Correct": 0.253,
+    "Error1": 0.225,
+    "Absolutely_Error": 0.202,
+    "Partially_Correct": 0.173,
+    "Error2": 0.082,
+    "Error3": 0.031,
+    "Error4": 0.026,
+    "Error6": 0.005,
+    "Error7": 0.0015,
+    "Error8": 0.0015,
+}
+TITLE_SCORE_PROBS = {1: 0.15, 2: 0.2, 3: 0.55, 4: 0.1}
+MAJORS = ["J23517", "J40192", "J57489", "J78901", "J87654"]
+AGES = np.arange(18, 25)
+N_METHODS = 5
+N_KNOWLEDGE = 8
+
+ALPHABET = np.array(list(string.ascii_letters + string.digits))
+HEX = np.array(list("0123456789abcdef"))
+
+
+class SyntheticDataGenerator:
+    """按给定规模生成与真实数据格式一致的确定性模拟数据
+
+    生成 Data_StudentInfo.csv、Data_TitleInfo.csv 以及 SubmitRecord-Class*.csv，
+    相同参数和随机种子总是得到相同的文件，用于在千万级以上的规模下评估各可视化流程。
+    """
+
+    def __init__(self, output_dir, n_rows=1_000_000, n_classes=15, n_students=None, n_titles=38,
+                 days=120, start_time=1698768000, seed=42, chunk_rows=1_000_000):
+        self.output_dir = output_dir
+        self.n_rows = n_rows
+        self.n_classes = n_classes
+        # 真实数据中每名学生约 170 次提交
+        self.n_students = n_students or max(n_classes, n_rows // 170)
+        self.n_titles = n_titles
+        self.days = days
+        self.start_time = start_time
+        self.seed = seed
+        self.chunk_rows = chunk_rows
+        self.students = None
+        self.titles = None
+
+    def _rng(self, *key):
+        """为每个生成步骤派生独立的随机数发生器，保证分块和顺序变化时结果仍然确定"""
+        return np.random.default_rng(np.random.SeedSequence([self.seed, *key]))
+
+    @staticmethod
+    def _random_ids(rng, n, length, alphabet, prefix=""):
+        chars = alphabet[rng.integers(0, len(alphabet), size=(n, length))]
+        return [prefix + "".join(row) for row in chars]
+
+    def generate_students(self):
+        """学生信息：性别、年龄、专业均匀分布"""
+        rng = self._rng(1)
+        n = self.n_students
+        self.students = pd.DataFrame({
+            "index": np.arange(1, n + 1),
+            "student_ID": self._random_ids(rng, n, 20, HEX),
+            "sex": rng.choice(["female", "male"], size=n),
+            "age": rng.choice(AGES, size=n),
+            "major": rng.choice(MAJORS, size=n),
+        })
+        # 学生均匀分配到各班级
+        self.students["class_idx"] = rng.permutation(np.arange(n) % self.n_classes)
+        # 学生活跃度呈长尾分布
+        self.students["activity"] = rng.lognormal(mean=0.0, sigma=0.6, size=n)
+        return self.students
+
+    def generate_titles(self):
+        """题目信息：约 15% 的题目同时关联两个知识点（真实数据中一题多行）"""
+        rng = self._rng(2)
+        knowledge = self._random_ids(rng, N_KNOWLEDGE, 5, ALPHABET)
+        title_ids = self._random_ids(rng, self.n_titles, 20, ALPHABET, prefix="Question_")
+        scores = rng.choice(list(TITLE_SCORE_PROBS), p=list(TITLE_SCORE_PROBS.values()), size=self.n_titles)
+        rows = []
+        for title_id, score in zip(title_ids, scores):
+            n_knowledge = 2 if rng.random() < 0.15 else 1
+            for k in rng.choice(N_KNOWLEDGE, size=n_knowledge, replace=False):
+                sub = "".join(rng.choice(ALPHABET[:36], size=8))
+                rows.append((title_id, int(score), knowledge[k], f"{knowledge[k]}_{sub.lower()}"))
+        self.titles = pd.DataFrame(rows, columns=["title_ID", "score", "knowledge", "sub_knowledge"])
+        self.titles.insert(0, "index", np.arange(1, len(self.titles) + 1))
+        return self.titles
+
+    def _submission_chunk(self, class_idx, chunk_idx, n, members, title_ids, title_scores, methods):
+        """生成某班级的一块提交记录"""
+        rng = self._rng(3, class_idx, chunk_idx)
+        weights = members["activity"].to_numpy()
+        student_pos = rng.choice(len(members), size=n, p=weights / weights.sum())
+        title_pos = rng.integers(0, len(title_ids), size=n)
+
+        # 提交时间：工作日更活跃，白天集中在 8~23 点
+        day = rng.integers(0, self.days, size=n)
+        weekday_weight = np.where((day % 7) < 5, 1.0, 0.6)
+        day = np.where(rng.random(n) < weekday_weight, day, rng.integers(0, self.days, size=n))
+        hour = np.clip(rng.normal(15, 4, size=n), 0, 23.99)
+        time = self.start_time + day * 86400 + (hour * 3600).astype(np.int64)
+
+        states = np.array(list(STATE_PROBS))
+        probs = np.array(list(STATE_PROBS.values()))
+        state = states[rng.choice(len(states), size=n, p=probs / probs.sum())]
+        full_score = title_scores[title_pos]
+        partial = rng.integers(1, np.maximum(full_score, 2), size=n)
+        score = np.select(
+            [state == "Absolutely_Correct", state == "Partially_Correct"],
+            [full_score, np.minimum(partial, np.maximum(full_score - 1, 1))],
+            default=0,
+        )
+        memory = np.clip(rng.normal(300, 80, size=n), 0, None).astype(np.int64)
+        memory[(state == "Error1") & (rng.random(n) < 0.5)] = 0
+        timeconsume = 1 + rng.poisson(2, size=n)
+
+        return pd.DataFrame({
+            "class": f"Class{class_idx + 1}",
+            "time": time.astype(np.float64),
+            "state": state,
+            "score": score,
+            "title_ID": title_ids[title_pos],
+            "method": methods[rng.integers(0, len(methods), size=n)],
+            "memory": memory,
+            "timeconsume": timeconsume.astype(np.float64),
+            "student_ID": members["student_ID"].to_numpy()[student_pos],
+        })
+
+    def generate(self):
+        """生成全部文件，返回输出目录"""
+        os.makedirs(self.output_dir, exist_ok=True)
+        students = self.generate_students()
+        titles = self.generate_titles()
+        students.drop(columns=["class_idx", "activity"]).to_csv(
+            os.path.join(self.output_dir, "Data_StudentInfo.csv"), index=False)
+        titles.to_csv(os.path.join(self.output_dir, "Data_TitleInfo.csv"), index=False)
+
+        unique_titles = titles.drop_duplicates("title_ID")
+        title_ids = unique_titles["title_ID"].to_numpy()
+        title_scores = unique_titles["score"].to_numpy()
+        methods = np.array(self._random_ids(self._rng(4), N_METHODS, 20, ALPHABET, prefix="Method_"))
+
+        # 各班级行数与学生人数成正比
+        class_sizes = np.bincount(students["class_idx"], minlength=self.n_classes)
+        class_rows = np.floor(self.n_rows * class_sizes / class_sizes.sum()).astype(np.int64)
+        class_rows[: self.n_rows - class_rows.sum()] += 1
+
+        for class_idx in range(self.n_classes):
+            path = os.path.join(self.output_dir, f"SubmitRecord-Class{class_idx + 1}.csv")
+            members = students[students["class_idx"] == class_idx]
+            remaining, offset, chunk_idx = int(class_rows[class_idx]), 0, 0
+            with open(f"{path}.tmp", "w", encoding="utf-8", newline="") as f:
+                while remaining > 0 or chunk_idx == 0:
+                    n = min(remaining, self.chunk_rows)
+                    chunk = self._submission_chunk(class_idx, chunk_idx, n, members, title_ids, title_scores, methods)
+                    chunk.insert(0, "index", np.arange(offset, offset + n))
+                    chunk.to_csv(f, index=False, header=(chunk_idx == 0))
+                    remaining -= n
+                    offset += n
+                    chunk_idx += 1
+            os.replace(f"{path}.tmp", path)
+        return self.output_dir
+
+
+def main():
+    parser = argparse.ArgumentParser(description="生成确定性的模拟学生行为数据")
+    parser.add_argument("--out", required=True, help="输出目录")
+    parser.add_argument("--rows", type=int, default=1_000_000, help="提交记录总行数")
+    parser.add_argument("--classes", type=int, default=15)
+    parser.add_argument("--students", type=int, default=None)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+    SyntheticDataGenerator(args.out, n_rows=args.rows, n_classes=args.classes,
+                           n_students=args.students, seed=args.seed).generate()
+    print(f"模拟数据已生成到: {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,39 +1,37 @@
 import os
-import glob
 import pandas as pd
 from pyecharts import options as opts
 from pyecharts.charts import Bar, Timeline
 from pyecharts.globals import ThemeType
+from .profiling import trace_stage
+from .columnar_store import load_submit_frame
+from .partitions import load_submit_records_pruned
 
 class TimelineVisualizer:
-    def __init__(self, data_path):
+    def __init__(self, data_path, classes=None, start=None, end=None, submit_df=None):
         self.data_path = data_path
-        self.submit_df = None
+        # 可选的班级和时间范围 [start, end)，指定后只读取命中的分区
+        self.classes = classes
+        self.start = start
+        self.end = end
+        # 已传入的提交记录（如按班级批量导出时的班级切片）直接使用，不再读取文件
+        self.submit_df = submit_df
+        self.chart = None
 
+    @trace_stage(rows_out="submit_df")
     def load_data(self):
         """加载并合并所有班级数据"""
-        # 获取所有提交记录文件路径
-        submitrecord_paths = glob.glob(os.path.join(self.data_path, "SubmitRecord-Class*.csv"))
-        submit_df_list = []
-        
-        for path in submitrecord_paths:
-            # 读取CSV
-            temp_df = pd.read_csv(path)
-            
-            # 健壮性处理：如果CSV里没有'class'列，尝试从文件名解析 (e.g., "SubmitRecord-Class1.csv")
-            if 'class' not in temp_df.columns:
-                basename = os.path.basename(path)
-                # 提取数字部分，拼凑成 'Class1' 格式
-                class_num = ''.join(filter(str.isdigit, basename))
-                temp_df['class'] = f"Class{class_num}" if class_num else "Unknown"
-            
-            submit_df_list.append(temp_df)
-            
-        if not submit_df_list:
-             raise FileNotFoundError("未找到任何 SubmitRecord-Class*.csv 文件，请检查 data 目录。")
+        if self.submit_df is not None:
+            return
+        if self.classes or self.start is not None or self.end is not None:
+            self.submit_df = load_submit_records_pruned(
+                self.data_path, columns=["class", "time"], classes=self.classes, start=self.start, end=self.end)
+            return
 
-        self.submit_df = pd.concat(submit_df_list, ignore_index=True)
+        # 从共享的列式存储读取（只需班级和时间列）
+        self.submit_df = load_submit_frame(self.data_path, columns=["class", "time"])
 
+    @trace_stage(rows_in="submit_df", rows_out="submit_df")
     def preprocess_data(self):
         """处理时间数据"""
         # 确保 time 列存在
@@ -47,10 +45,15 @@ class TimelineVisualizer:
         # 确保 class 列是字符串类型，方便排序
         self.submit_df['class'] = self.submit_df['class'].astype(str)
 
+    def daily_counts(self):
+        """统计每天、每班的提交量"""
+        return self.submit_df.groupby(['date', 'class']).size().reset_index(name='count')
+
+    @trace_stage(rows_in="submit_df")
     def generate_timeline(self, output_path):
         """生成时间轮播图：按日期展示各班级的提交量"""
         # 1. 数据聚合：统计每天、每班的提交量
-        data_agg = self.submit_df.groupby(['date', 'class']).size().reset_index(name='count')
+        data_agg = self.daily_counts()
         
         # 2. 准备基础数据
         dates = sorted(data_agg['date'].unique()) # 所有日期（时间轴刻度）
@@ -98,9 +101,11 @@ class TimelineVisualizer:
             tl.add(bar, "{}".format(d))
 
         # 5. 保存结果
+        self.chart = tl
         tl.render(output_path)
         print(f"Timeline visualization saved to: {output_path}")
 
+    @trace_stage()
     def visualize(self, output_path=None):
         """执行流程接口"""
         if output_path is None:
@@ -0,0 +1,93 @@
+"""生产环境入口：以多进程 + 多线程的 gunicorn 运行 Flask/Dash 应用
+
+数据、图表和 Dash 布局在主进程中预先加载，随后 fork 出的工作进程以写时复制方式共享这些内存。
+
+用法：
+    python serve.py --workers 4 --threads 8 --port 8000
+    python serve.py --generate          # 启动前重新生成全部图表
+"""
+import os
+import shutil
+import tempfile
+import argparse
+import multiprocessing
+from gunicorn.app.base import BaseApplication
+
+
+class DashboardServer(BaseApplication):
+    """以编程方式配置的 gunicorn 应用，直接使用已加载好的 WSGI 对象"""
+
+    def __init__(self, application, options=None):
+        self.application = application
+        self.options = options or {}
+        super().__init__()
+
+    def load_config(self):
+        for key, value in self.options.items():
+            if key in self.cfg.settings and value is not None:
+                self.cfg.set(key, value)
+
+    def load(self):
+        return self.application
+
+
+def prepare_metrics_dir(port):
+    """各工作进程汇总 /metrics 用的共享目录，启动时清空上一次运行留下的快照"""
+    from service.metrics import METRICS_DIR_ENV
+    metrics_dir = os.environ.get(METRICS_DIR_ENV) or os.path.join(tempfile.gettempdir(), f"dashboard-metrics-{port}")
+    shutil.rmtree(metrics_dir, ignore_errors=True)
+    os.makedirs(metrics_dir)
+    os.environ[METRICS_DIR_ENV] = metrics_dir
+    return metrics_dir
+
+
+def post_fork(server, worker):
+    """gunicorn 钩子：工作进程从干净的指标开始统计"""
+    from service.metrics import request_metrics
+    request_metrics.worker_started()
+
+
+def prepare_app(generate=False):
+    """在 fork 之前完成图表生成、布局设置和数据预热"""
+    import app
+    if generate:
+        app.generate_visualizations()
+    app.setup_dash_layout()
+    app.warm_up()
+    return app.server
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="以生产模式运行可视化大屏")
+    parser.add_argument("--host", default=os.environ.get("WEB_HOST", "0.0.0.0"))
+    parser.add_argument("--port", type=int, default=int(os.environ.get("WEB_PORT", 8000)))
+    parser.add_argument("--workers", type=int,
+                        default=int(os.environ.get("WEB_WORKERS", multiprocessing.cpu_count() * 2 + 1)),
+                        help="工作进程数（默认 CPU 核数 * 2 + 1）")
+    parser.add_argument("--threads", type=int, default=int(os.environ.get("WEB_THREADS", 4)),
+                        help="每个工作进程的线程数")
+    parser.add_argument("--timeout", type=int, default=int(os.environ.get("WEB_TIMEOUT", 60)))
+    parser.add_argument("--generate", action="store_true", help="启动前重新生成全部图表")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    prepare_metrics_dir(args.port)
+    application = prepare_app(generate=args.generate)
+    options = {
+        "bind": f"{args.host}:{args.port}",
+        "workers": args.workers,
+        "threads": args.threads,
+        "worker_class": "gthread",
+        "timeout": args.timeout,
+        "preload_app": True,
+        "accesslog": "-",
+        "post_fork": post_fork,
+    }
+    print(f"以 {args.workers} 个进程 x {args.threads} 个线程在 {options['bind']} 上提供服务")
+    DashboardServer(application, options).run()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,3 @@
+from .charts import init_charts
+from .cache import init_cache, response_cache
+from .metrics import init_metrics, request_metrics
@@ -0,0 +1,168 @@
+import os
+import time
+import hashlib
+import threading
+from collections import OrderedDict
+from functools import wraps
+from flask import Response, jsonify, make_response, request
+
+
+class ResponseCache:
+    """路由响应缓存：有界 LRU + TTL，可选总字节数上限
+
+    缓存键由路由、请求参数（POST 时为请求体摘要）和数据版本组成；
+    检测到数据版本变化时清空全部条目并调用注册的失效回调。
+    """
+
+    def __init__(self, max_entries=1024, ttl=300, max_bytes=None, version_func=None, version_check_interval=5):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.version_func = version_func
+        self.version_check_interval = version_check_interval
+        self.entries = OrderedDict()     # key -> (过期时间, 字节数, 状态码, 响应头, 响应体)
+        self.size_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+        self.version = None
+        self._version_checked_at = 0.0
+        self._invalidation_hooks = []
+        self._lock = threading.Lock()
+
+    def configure(self, max_entries=None, ttl=None, max_bytes=None, version_func=None):
+        if max_entries is not None:
+            self.max_entries = max_entries
+        if ttl is not None:
+            self.ttl = ttl
+        if max_bytes is not None:
+            self.max_bytes = max_bytes or None
+        if version_func is not None:
+            self.version_func = version_func
+
+    def on_invalidate(self, hook):
+        """注册数据重建时的回调（如重置预计算的查询数据）"""
+        self._invalidation_hooks.append(hook)
+        return hook
+
+    def current_version(self):
+        """返回当前数据版本，版本号按固定间隔检查，避免每个请求都访问文件系统"""
+        if self.version_func is None:
+            return None
+        now = time.monotonic()
+        if now - self._version_checked_at >= self.version_check_interval:
+            self._version_checked_at = now
+            version = self.version_func()
+            if self.version is not None and version != self.version:
+                self.invalidate()
+            self.version = version
+        return self.version
+
+    def invalidate(self):
+        """清空全部条目"""
+        with self._lock:
+            self.entries.clear()
+            self.size_bytes = 0
+            self.invalidations += 1
+        for hook in self._invalidation_hooks:
+            hook()
+
+    def get(self, key):
+        with self._lock:
+            entry = self.entries.get(key)
+            if entry is None or entry[0] < time.monotonic():
+                if entry is not None:
+                    self._remove(key)
+                self.misses += 1
+                return None
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return entry
+
+    def set(self, key, status, headers, body):
+        size = len(body)
+        if self.max_bytes is not None and size > self.max_bytes:
+            return
+        with self._lock:
+            if key in self.entries:
+                self._remove(key)
+            self.entries[key] = (time.monotonic() + self.ttl, size, status, headers, body)
+            self.size_bytes += size
+            while self.entries and (len(self.entries) > self.max_entries or
+                                    (self.max_bytes is not None and self.size_bytes > self.max_bytes)):
+                self._remove(next(iter(self.entries)))
+                self.evictions += 1
+
+    def _remove(self, key):
+        entry = self.entries.pop(key)
+        self.size_bytes -= entry[1]
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self.entries),
+            "size_bytes": self.size_bytes,
+            "max_entries": self.max_entries,
+            "max_bytes": self.max_bytes,
+            "ttl": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": self.hits / lookups if lookups else 0.0,
+            "evictions": self.evictions,
+            "invalidations": self.invalidations,
+            "data_version": self.version,
+        }
+
+    def request_key(self):
+        """由路由、参数和数据版本生成缓存键"""
+        body = request.get_data() if request.method == "POST" else b""
+        return (
+            request.method,
+            request.path,
+            tuple(sorted(request.args.items(multi=True))),
+            hashlib.sha1(body).hexdigest() if body else None,
+            self.current_version(),
+        )
+
+    def cached(self, view):
+        """视图装饰器：命中时直接返回缓存的响应，只缓存状态码为 200 的响应"""
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            key = self.request_key()
+            entry = self.get(key)
+            if entry is not None:
+                _, _, status, headers, body = entry
+                response = Response(body, status=status, headers=headers)
+                response.headers["X-Cache"] = "HIT"
+                return response
+
+            response = view(*args, **kwargs)
+            if not isinstance(response, Response):
+                response = make_response(response)
+            if response.status_code == 200 and not response.direct_passthrough:
+                headers = [(k, v) for k, v in response.headers.items() if k.lower() != "content-length"]
+                self.set(key, response.status_code, headers, response.get_data())
+            response.headers["X-Cache"] = "MISS"
+            return response
+        return wrapper
+
+
+response_cache = ResponseCache()
+
+
+def init_cache(server, version_func):
+    """按环境变量配置缓存并注册统计接口"""
+    max_bytes = os.environ.get("RESPONSE_CACHE_MAX_BYTES")
+    response_cache.configure(
+        max_entries=int(os.environ.get("RESPONSE_CACHE_MAX_ENTRIES", 1024)),
+        ttl=float(os.environ.get("RESPONSE_CACHE_TTL", 300)),
+        max_bytes=int(max_bytes) if max_bytes else None,
+        version_func=version_func,
+    )
+
+    @server.route("/api/cache/stats")
+    def cache_stats():
+        return jsonify(response_cache.stats())
+
+    return response_cache
@@ -0,0 +1,113 @@
+import os
+import json
+import hashlib
+from flask import Blueprint, Response, abort, jsonify, request
+from ml.asset_paths import ASSETS_DIR_NAME
+from ml.chart_export import CHARTS, chart_json_path
+from .compression import load_variants, negotiate, send_precompressed
+
+# 带版本号的请求可长期缓存
+IMMUTABLE_MAX_AGE = 365 * 24 * 3600
+# 图表页面会随数据重建而变化，只做短期缓存
+PAGE_MAX_AGE = 3600
+
+charts_bp = Blueprint("charts", __name__)
+
+
+class ChartPayloadStore:
+    """在内存中保存各图表 JSON 数据及其压缩结果，优先读取生成阶段写出的预压缩副本"""
+
+    def __init__(self):
+        self.result_dir = None
+        self.payloads = {}
+
+    def load(self, result_dir):
+        self.result_dir = result_dir
+        payloads = {}
+        for name in CHARTS:
+            path = chart_json_path(result_dir, name)
+            if not os.path.exists(path):
+                continue
+            variants = load_variants(path)
+            raw = variants["identity"]
+            payloads[name] = {
+                "version": json.loads(raw).get("data_version"),
+                "etag": hashlib.sha1(raw).hexdigest()[:16],
+                "variants": variants,
+            }
+        self.payloads = payloads
+        return self
+
+    def get(self, name):
+        return self.payloads.get(name)
+
+
+payload_store = ChartPayloadStore()
+
+
+def init_charts(server, result_dir):
+    """加载图表数据并注册路由"""
+    payload_store.load(result_dir)
+    server.register_blueprint(charts_bp)
+
+
+def _etag_matches(etag):
+    """If-None-Match 中的 ETag 忽略编码后缀进行比较"""
+    if_none_match = request.if_none_match
+    if if_none_match.star_tag:
+        return True
+    return any(tag.split("-")[0] == etag for tag in if_none_match.as_set(include_weak=True))
+
+
+@charts_bp.route("/api/charts")
+def chart_index():
+    """图表清单：返回带数据版本号的数据地址，前端据此请求可长期缓存的数据"""
+    charts = {
+        name: {
+            "url": f"/api/charts/{name}?v={payload['version']}",
+            "page": f"/charts/{CHARTS[name]}",
+            "version": payload["version"],
+        }
+        for name, payload in payload_store.payloads.items()
+    }
+    response = jsonify({"charts": charts})
+    response.headers["Cache-Control"] = "no-cache"
+    return response
+
+
+@charts_bp.route("/api/charts/<name>")
+def chart_data(name):
+    """单个图表的 option 与数据，支持 gzip/br 压缩和 ETag 协商缓存"""
+    payload = payload_store.get(name)
+    if payload is None:
+        abort(404)
+
+    if request.args.get("v") == payload["version"]:
+        cache_control = f"public, max-age={IMMUTABLE_MAX_AGE}, immutable"
+    else:
+        cache_control = "public, max-age=0, must-revalidate"
+
+    encoding = negotiate(request.accept_encodings, payload["variants"])
+    if request.if_none_match and _etag_matches(payload["etag"]):
+        response = Response(status=304)
+    else:
+        response = Response(payload["variants"][encoding], mimetype="application/json")
+        if encoding != "identity":
+            response.headers["Content-Encoding"] = encoding
+    response.set_etag(payload["etag"] if encoding == "identity" else f"{payload['etag']}-{encoding}")
+    response.headers["Cache-Control"] = cache_control
+    response.headers["Vary"] = "Accept-Encoding"
+    return response
+
+
+@charts_bp.route("/charts/<path:filename>")
+def chart_page(filename):
+    """生成的图表页面，由 iframe 按地址加载，不再内联到布局中"""
+    return send_precompressed(payload_store.result_dir, filename, max_age=PAGE_MAX_AGE)
+
+
+@charts_bp.route("/assets/<path:filename>")
+def chart_asset(filename):
+    """各页面共用的本地图表运行时，路径中带版本号，可长期缓存"""
+    return send_precompressed(os.path.join(payload_store.result_dir, ASSETS_DIR_NAME), filename,
+                              max_age=IMMUTABLE_MAX_AGE)
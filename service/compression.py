@@ -0,0 +1,85 @@
+import os
+import gzip
+import mimetypes
+from flask import abort, request, send_file
+from werkzeug.security import safe_join
+
+# brotli 为可选依赖，未安装时只提供 gzip
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# 协商时的优先顺序
+ENCODINGS = ("br", "gzip", "identity")
+
+# 预压缩副本的后缀
+PRECOMPRESSED_SUFFIXES = {"br": ".br", "gzip": ".gz"}
+
+
+def compress(raw, encoding):
+    """按指定编码压缩字节串"""
+    if encoding == "br":
+        return brotli.compress(raw, quality=11)
+    if encoding == "gzip":
+        return gzip.compress(raw, compresslevel=9, mtime=0)
+    return raw
+
+
+def compress_variants(raw):
+    """生成所有可用编码的压缩结果 {编码: 字节串}"""
+    variants = {"identity": raw, "gzip": compress(raw, "gzip")}
+    if brotli is not None:
+        variants["br"] = compress(raw, "br")
+    return variants
+
+
+def negotiate(accept_encodings, available):
+    """根据请求的 Accept-Encoding 选择编码，available 为可提供的编码集合"""
+    candidates = [enc for enc in ENCODINGS if enc in available]
+    return accept_encodings.best_match(candidates, default="identity") or "identity"
+
+
+def precompressed_siblings(path):
+    """返回文件已有且不旧于原文件的预压缩副本 {编码: 路径}"""
+    siblings = {}
+    mtime = os.path.getmtime(path)
+    for encoding, suffix in PRECOMPRESSED_SUFFIXES.items():
+        sibling = f"{path}{suffix}"
+        if os.path.exists(sibling) and os.path.getmtime(sibling) >= mtime:
+            siblings[encoding] = sibling
+    return siblings
+
+
+def load_variants(path):
+    """读取文件及其各编码版本，优先使用预压缩副本，缺失的编码当场压缩"""
+    with open(path, "rb") as f:
+        raw = f.read()
+    variants = {"identity": raw}
+    for encoding, sibling in precompressed_siblings(path).items():
+        with open(sibling, "rb") as f:
+            variants[encoding] = f.read()
+    for encoding, data in compress_variants(raw).items():
+        variants.setdefault(encoding, data)
+    return variants
+
+
+def send_precompressed(directory, filename, max_age):
+    """发送静态文件，客户端支持时直接发送预压缩副本，不在请求时压缩"""
+    path = safe_join(directory, filename)
+    if path is None or not os.path.isfile(path):
+        abort(404)
+    siblings = precompressed_siblings(path)
+    encoding = negotiate(request.accept_encodings, set(siblings) | {"identity"})
+    mimetype = mimetypes.guess_type(path)[0] or "application/octet-stream"
+    # 发送压缩副本时文件名仍为原文件名，避免 Content-Disposition 中出现 .gz/.br 后缀
+    download_name = os.path.basename(path)
+    if encoding == "identity":
+        response = send_file(path, mimetype=mimetype, max_age=max_age, conditional=True,
+                             download_name=download_name)
+    else:
+        response = send_file(siblings[encoding], mimetype=mimetype, max_age=max_age, conditional=True,
+                             download_name=download_name)
+        response.headers["Content-Encoding"] = encoding
+    response.headers["Vary"] = "Accept-Encoding"
+    return response
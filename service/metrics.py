@@ -0,0 +1,354 @@
+import os
+import json
+import time
+import threading
+from bisect import bisect_left
+from flask import Response, g, request
+
+from ml.profiling import current_rss
+
+# 多进程部署时各工作进程写出指标快照的共享目录（与 prometheus_client 的多进程模式同名），未设置时只统计本进程
+METRICS_DIR_ENV = "PROMETHEUS_MULTIPROC_DIR"
+# 工作进程写出快照的间隔（秒），抓取时处理请求的进程会先写出自己的最新值
+FLUSH_INTERVAL = 1.0
+
+# 请求延迟直方图的桶上限（秒）
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+# 响应大小直方图的桶上限（字节）
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(names, values):
+    if not names:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in zip(names, values)) + "}"
+
+
+def _format_value(value):
+    if value is None:
+        return "NaN"
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Histogram:
+    """带标签的累积直方图，观测值只做一次二分查找"""
+
+    def __init__(self, name, help_text, label_names, buckets):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = label_names
+        self.buckets = buckets
+        self.series = {}        # 标签值 -> [各桶计数..., 总和, 总数]
+        self._lock = threading.Lock()
+
+    def observe(self, labels, value):
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self.series.get(labels)
+            if series is None:
+                series = self.series[labels] = [0] * (len(self.buckets) + 1) + [0.0, 0]
+            series[index] += 1
+            series[-2] += value
+            series[-1] += 1
+
+    def snapshot(self):
+        with self._lock:
+            return {labels: list(series) for labels, series in self.series.items()}
+
+    def render(self, series=None):
+        """series 为合并后的 {标签值: 桶计数}，默认使用本进程的统计"""
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        items = sorted((self.snapshot() if series is None else series).items())
+        names = self.label_names + ("le",)
+        for labels, series in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), series):
+                cumulative += count
+                lines.append(f"{self.name}_bucket{_format_labels(names, labels + (_format_value(bound),))} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(self.label_names, labels)} {_format_value(series[-2])}")
+            lines.append(f"{self.name}_count{_format_labels(self.label_names, labels)} {series[-1]}")
+        return lines
+
+
+class Counter:
+    """带标签的累加计数器"""
+
+    def __init__(self, name, help_text, label_names):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = label_names
+        self.series = {}
+        self._lock = threading.Lock()
+
+    def inc(self, labels, value=1):
+        with self._lock:
+            self.series[labels] = self.series.get(labels, 0) + value
+
+    def snapshot(self):
+        with self._lock:
+            return dict(self.series)
+
+    def render(self, series=None):
+        """series 为合并后的 {标签值: 计数}，默认使用本进程的统计"""
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} counter"]
+        items = sorted((self.snapshot() if series is None else series).items())
+        for labels, value in items:
+            lines.append(f"{self.name}{_format_labels(self.label_names, labels)} {_format_value(value)}")
+        return lines
+
+
+def _samples(name, help_text, samples, label_names=(), kind="gauge"):
+    """采集时计算的指标；samples 为 [(标签值元组, 数值)]"""
+    lines = [f"# HELP {name} {help_text}", f"# TYPE {name} {kind}"]
+    for labels, value in samples:
+        lines.append(f"{name}{_format_labels(label_names, labels)} {_format_value(value)}")
+    return lines
+
+
+def _merge(total, series, add):
+    """将一个进程的 {标签值: 数值} 累加到 total"""
+    for labels, value in series.items():
+        total[labels] = add(total[labels], value) if labels in total else value
+
+
+def _pid_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+class RequestMetrics:
+    """请求与运行状态指标，以 Prometheus 文本格式导出
+
+    请求相关指标在 Flask 请求钩子中累计；内存、数据新鲜度、流程耗时与缓存命中率等
+    在每次抓取时由注册的采集函数计算，不占用请求路径。
+
+    设置环境变量 PROMETHEUS_MULTIPROC_DIR 时（serve.py 会设置），每个工作进程定期把自己的计数写成
+    该目录下的 worker-<pid>.json，/metrics 汇总所有进程：计数器和直方图求和（已退出进程的计数保留，
+    总数不会回退），进程级的仪表（正在处理的请求数、常驻内存、启动时间）带 pid 标签且只列出存活的进程。
+    """
+
+    def __init__(self):
+        self.latency = Histogram("http_request_duration_seconds", "请求处理耗时",
+                                 ("method", "route", "status"), LATENCY_BUCKETS)
+        self.response_size = Histogram("http_response_size_bytes", "响应体大小",
+                                       ("method", "route"), SIZE_BUCKETS)
+        self.requests = Counter("http_requests_total", "请求总数", ("method", "route", "status"))
+        self.in_flight = 0
+        self.started_at = time.time()
+        self.collectors = []
+        self._lock = threading.Lock()
+
+    @property
+    def shared_dir(self):
+        return os.environ.get(METRICS_DIR_ENV)
+
+    def collector(self, func):
+        """注册抓取时调用的采集函数，函数返回 Prometheus 文本行列表"""
+        self.collectors.append(func)
+        return func
+
+    def before_request(self):
+        g.metrics_start = time.perf_counter()
+        g.metrics_in_flight = True
+        with self._lock:
+            self.in_flight += 1
+
+    def after_request(self, response):
+        start = g.pop("metrics_start", None)
+        if start is None:
+            return response
+        # 按路由规则而非实际路径分组，避免标签数量随学生 ID 等参数增长
+        route = request.url_rule.rule if request.url_rule is not None else "unmatched"
+        status = str(response.status_code)
+        self.latency.observe((request.method, route, status), time.perf_counter() - start)
+        self.requests.inc((request.method, route, status))
+        size = response.content_length
+        if size is None and not response.direct_passthrough and not response.is_streamed:
+            size = len(response.get_data())
+        if size is not None:
+            self.response_size.observe((request.method, route), size)
+        return response
+
+    def teardown_request(self, exc):
+        if g.pop("metrics_in_flight", False):
+            with self._lock:
+                self.in_flight -= 1
+
+    def worker_started(self):
+        """在 fork 出的工作进程中调用：清空从主进程继承的计数，启动定期写出快照的线程（线程不会随 fork 复制）"""
+        self.latency.series.clear()
+        self.response_size.series.clear()
+        self.requests.series.clear()
+        self.in_flight = 0
+        self.started_at = time.time()
+        if self.shared_dir:
+            threading.Thread(target=self._flush_loop, name="metrics-flusher", daemon=True).start()
+
+    def _flush_loop(self):
+        while True:
+            time.sleep(FLUSH_INTERVAL)
+            try:
+                self.flush()
+            except OSError:
+                pass
+
+    def snapshot(self):
+        """本进程的全部计数，标签值元组转为列表以便写成 JSON"""
+        def encode(series):
+            return [[list(labels), value] for labels, value in series.items()]
+
+        return {
+            "pid": os.getpid(),
+            "latency": encode(self.latency.snapshot()),
+            "requests": encode(self.requests.snapshot()),
+            "response_size": encode(self.response_size.snapshot()),
+            "in_flight": self.in_flight,
+            "rss": current_rss(),
+            "started_at": self.started_at,
+        }
+
+    def flush(self):
+        """把本进程的快照原子地写到共享目录"""
+        shared_dir = self.shared_dir
+        if not shared_dir:
+            return
+        os.makedirs(shared_dir, exist_ok=True)
+        path = os.path.join(shared_dir, f"worker-{os.getpid()}.json")
+        with open(f"{path}.tmp", "w", encoding="utf-8") as f:
+            json.dump(self.snapshot(), f)
+        os.replace(f"{path}.tmp", path)
+
+    def _snapshots(self):
+        """所有进程的快照；未启用共享目录时只有本进程"""
+        if not self.shared_dir:
+            return [self.snapshot()]
+        self.flush()
+        snapshots = []
+        for name in os.listdir(self.shared_dir):
+            if not (name.startswith("worker-") and name.endswith(".json")):
+                continue
+            try:
+                with open(os.path.join(self.shared_dir, name), encoding="utf-8") as f:
+                    snapshots.append(json.load(f))
+            except (OSError, ValueError):
+                continue
+        return snapshots
+
+    def render(self):
+        snapshots = self._snapshots()
+        latency, requests, response_size = {}, {}, {}
+        add_series = lambda a, b: [x + y for x, y in zip(a, b)]
+        for snap in snapshots:
+            _merge(latency, {tuple(k): v for k, v in snap["latency"]}, add_series)
+            _merge(requests, {tuple(k): v for k, v in snap["requests"]}, lambda a, b: a + b)
+            _merge(response_size, {tuple(k): v for k, v in snap["response_size"]}, add_series)
+        live = sorted((snap for snap in snapshots if snap["pid"] == os.getpid() or _pid_alive(snap["pid"])),
+                      key=lambda snap: snap["pid"])
+
+        lines = []
+        lines += self.latency.render(latency)
+        lines += self.requests.render(requests)
+        lines += self.response_size.render(response_size)
+        lines += _samples("http_requests_in_flight", "正在处理的请求数",
+                          [((snap["pid"],), snap["in_flight"]) for snap in live], ("pid",))
+        lines += _samples("process_resident_memory_bytes", "进程常驻内存",
+                          [((snap["pid"],), snap["rss"]) for snap in live], ("pid",))
+        lines += _samples("process_start_time_seconds", "进程启动时间",
+                          [((snap["pid"],), snap["started_at"]) for snap in live], ("pid",))
+        for collect in self.collectors:
+            try:
+                lines += collect()
+            except Exception as e:
+                lines.append(f"# 采集失败 {getattr(collect, '__name__', collect)}: {e}")
+        return "\n".join(lines) + "\n"
+
+
+request_metrics = RequestMetrics()
+
+
+class PipelineTraceReader:
+    """读取生成阶段导出的流程追踪文件，按修改时间缓存解析结果"""
+
+    def __init__(self, path):
+        self.path = path
+        self.mtime = None
+        self.spans = []
+
+    def load(self):
+        try:
+            mtime = os.path.getmtime(self.path)
+        except OSError:
+            return self.mtime, []
+        if mtime != self.mtime:
+            with open(self.path, encoding="utf-8") as f:
+                events = json.load(f)["traceEvents"]
+            self.spans = [(e["name"], e["dur"] / 1e6, e["args"]) for e in events]
+            self.mtime = mtime
+        return self.mtime, self.spans
+
+
+def init_metrics(server, data_info, trace_path, chart_stages, caches):
+    """注册请求钩子、采集函数与 /metrics 接口
+
+    data_info 返回 (数据更新时间, 提交记录行数)；chart_stages 为图表名 -> 流程中对应的阶段名；
+    caches 为缓存名 -> 返回 (命中数, 未命中数, 条目数) 的函数。
+    """
+    server.before_request(request_metrics.before_request)
+    server.after_request(request_metrics.after_request)
+    server.teardown_request(request_metrics.teardown_request)
+    trace_reader = PipelineTraceReader(trace_path)
+
+    @request_metrics.collector
+    def dataset_metrics():
+        updated_at, rows = data_info()
+        age = time.time() - updated_at if updated_at is not None else None
+        return (_samples("dataset_age_seconds", "距数据文件最近一次更新的秒数", [((), age)])
+                + _samples("dataset_rows", "提交记录行数", [((), rows)]))
+
+    @request_metrics.collector
+    def pipeline_metrics():
+        generated_at, spans = trace_reader.load()
+        durations = {name: duration for name, duration, _ in spans}
+        rows = {name: args.get("rows_out") for name, _, args in spans if args.get("rows_out") is not None}
+        return (_samples("pipeline_chart_duration_seconds", "最近一次生成各图表的耗时",
+                       [((chart,), durations[stage]) for chart, stage in chart_stages.items() if stage in durations],
+                       ("chart",))
+                + _samples("pipeline_stage_duration_seconds", "最近一次生成中各阶段的耗时",
+                         [((name,), duration) for name, duration in sorted(durations.items())], ("stage",))
+                + _samples("pipeline_stage_rows", "最近一次生成中各阶段的输出行数",
+                         [((name,), count) for name, count in sorted(rows.items())], ("stage",))
+                + _samples("pipeline_last_run_timestamp_seconds", "最近一次生成完成的时间", [((), generated_at)]))
+
+    @request_metrics.collector
+    def cache_metrics():
+        hits, misses, ratios, entries = [], [], [], []
+        for name, stats in caches.items():
+            hit, miss, size = stats()
+            hits.append(((name,), hit))
+            misses.append(((name,), miss))
+            ratios.append(((name,), hit / (hit + miss) if hit + miss else 0.0))
+            entries.append(((name,), size))
+        return (_samples("cache_hits_total", "缓存命中次数", hits, ("cache",), kind="counter")
+                + _samples("cache_misses_total", "缓存未命中次数", misses, ("cache",), kind="counter")
+                + _samples("cache_hit_ratio", "缓存命中率", ratios, ("cache",))
+                + _samples("cache_entries", "缓存条目数", entries, ("cache",)))
+
+    @server.route("/metrics")
+    def metrics():
+        return Response(request_metrics.render(), mimetype=None, content_type=CONTENT_TYPE,
+                        headers={"Cache-Control": "no-store"})
+
+    return request_metrics
@@ -0,0 +1,40 @@
+import os
+import sys
+import urllib.request
+
+import pytest
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, PROJECT_ROOT)
+
+from ml import assets  # noqa: E402
+
+
+def offline(*args, **kwargs):
+    raise OSError("network unreachable")
+
+
+def test_offline_build_fails_instead_of_using_cdn(tmp_path, monkeypatch):
+    monkeypatch.delenv("CHART_ASSET_SOURCE", raising=False)
+    monkeypatch.setattr(urllib.request, "urlopen", offline)
+    with pytest.raises(FileNotFoundError, match="CHART_ASSET_SOURCE"):
+        assets.prepare_local_assets(str(tmp_path))
+    # plotly.js 与 ECharts 分开准备，离线时仍取自已安装的包
+    assert (tmp_path / "assets" / assets.plotly_version() / assets.PLOTLY_FILE).stat().st_size > 0
+    assert not list((tmp_path / "assets" / assets.echarts_version()).iterdir())
+
+
+def test_echarts_from_source_dir(tmp_path, monkeypatch):
+    source = tmp_path / "source"
+    source.mkdir()
+    for name in assets.ECHARTS_FILES:
+        (source / name).write_text("/* echarts */")
+    monkeypatch.setenv("CHART_ASSET_SOURCE", str(source))
+    monkeypatch.setattr(urllib.request, "urlopen", offline)
+    try:
+        assert assets.prepare_local_assets(str(tmp_path / "results"))
+        assert assets.plotly_include().startswith(f"{assets.ASSETS_URL}/{assets.plotly_version()}/")
+    finally:
+        assets.use_local_assets(False)
+    for name in assets.ECHARTS_FILES:
+        assert (tmp_path / "results" / "assets" / assets.echarts_version() / name).exists()
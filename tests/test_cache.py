@@ -0,0 +1,103 @@
+import os
+import sys
+from types import SimpleNamespace
+
+from flask import Flask, jsonify, request
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, PROJECT_ROOT)
+
+from service import cache as cache_module  # noqa: E402
+from service.cache import ResponseCache  # noqa: E402
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def fake_clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(cache_module, "time", SimpleNamespace(monotonic=clock))
+    return clock
+
+
+def test_entries_expire_after_ttl(monkeypatch):
+    clock = fake_clock(monkeypatch)
+    cache = ResponseCache(ttl=10)
+    cache.set("a", 200, [], b"body")
+    clock.now += 9
+    assert cache.get("a") is not None
+    clock.now += 2
+    assert cache.get("a") is None
+    assert cache.stats()["entries"] == 0 and cache.size_bytes == 0
+
+
+def test_least_recently_used_entry_is_evicted_first():
+    cache = ResponseCache(max_entries=2)
+    cache.set("a", 200, [], b"1")
+    cache.set("b", 200, [], b"2")
+    cache.get("a")
+    cache.set("c", 200, [], b"3")
+    assert list(cache.entries) == ["a", "c"]
+    assert cache.evictions == 1
+
+
+def test_byte_limit_evicts_until_it_fits():
+    cache = ResponseCache(max_bytes=10)
+    cache.set("a", 200, [], b"x" * 4)
+    cache.set("b", 200, [], b"x" * 4)
+    cache.set("c", 200, [], b"x" * 6)
+    assert list(cache.entries) == ["b", "c"]
+    assert cache.size_bytes == 10
+    # 单个超过上限的响应不缓存，也不挤掉已有条目
+    cache.set("d", 200, [], b"x" * 11)
+    assert list(cache.entries) == ["b", "c"]
+    assert cache.evictions == 1
+
+
+def make_app(cache):
+    server = Flask(__name__)
+    calls = []
+
+    @server.route("/echo", methods=["GET", "POST"])
+    @cache.cached
+    def echo():
+        calls.append(request.get_data())
+        return jsonify({"args": request.args.to_dict(), "body": request.get_data(as_text=True)})
+
+    return server.test_client(), calls
+
+
+def test_post_body_is_part_of_the_key():
+    client, calls = make_app(ResponseCache())
+    assert client.post("/echo", data=b'{"a": 1}').headers["X-Cache"] == "MISS"
+    assert client.post("/echo", data=b'{"a": 1}').headers["X-Cache"] == "HIT"
+    response = client.post("/echo", data=b'{"a": 2}')
+    assert response.headers["X-Cache"] == "MISS"
+    assert response.get_json()["body"] == '{"a": 2}'
+    # 参数顺序不同视为同一请求
+    client.get("/echo?x=1&y=2")
+    assert client.get("/echo?y=2&x=1").headers["X-Cache"] == "HIT"
+    assert len(calls) == 3
+
+
+def test_version_change_clears_entries_and_runs_hooks():
+    version = {"value": 1}
+    hooks = []
+    cache = ResponseCache(version_func=lambda: version["value"], version_check_interval=0)
+    cache.on_invalidate(lambda: hooks.append(cache.version))
+    client, calls = make_app(cache)
+
+    client.get("/echo")
+    assert client.get("/echo").headers["X-Cache"] == "HIT"
+    assert hooks == []
+
+    version["value"] = 2
+    assert client.get("/echo").headers["X-Cache"] == "MISS"
+    assert hooks == [1]
+    assert cache.invalidations == 1 and cache.version == 2
+    assert len(calls) == 2
@@ -0,0 +1,31 @@
+import os
+import sys
+import gzip
+
+import pytest
+from flask import Flask
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, PROJECT_ROOT)
+
+from service.compression import send_precompressed  # noqa: E402
+
+
+@pytest.fixture
+def client(tmp_path):
+    raw = b"<html>" + b"chart " * 200 + b"</html>"
+    (tmp_path / "page.html").write_bytes(raw)
+    (tmp_path / "page.html.gz").write_bytes(gzip.compress(raw))
+    server = Flask(__name__)
+    server.add_url_rule("/charts/<path:filename>", "page",
+                        lambda filename: send_precompressed(str(tmp_path), filename, max_age=60))
+    return server.test_client()
+
+
+@pytest.mark.parametrize("accept, encoding", [("gzip", "gzip"), ("identity", None)])
+def test_precompressed_keeps_original_file_name(client, accept, encoding):
+    response = client.get("/charts/page.html", headers={"Accept-Encoding": accept})
+    assert response.status_code == 200
+    assert response.headers.get("Content-Encoding") == encoding
+    assert response.mimetype == "text/html"
+    assert response.headers["Content-Disposition"] == "inline; filename=page.html"
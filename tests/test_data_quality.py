@@ -0,0 +1,29 @@
+import os
+import sys
+import shutil
+
+import pandas as pd
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, PROJECT_ROOT)
+
+from ml.Dataquality import DataQualityChecker  # noqa: E402
+
+DATA_DIR = os.path.join(PROJECT_ROOT, "data")
+
+
+def test_missing_index_column_is_reported_not_raised(tmp_path):
+    for name in ("Data_StudentInfo.csv", "Data_TitleInfo.csv"):
+        shutil.copy(os.path.join(DATA_DIR, name), tmp_path / name)
+    records = pd.read_csv(os.path.join(DATA_DIR, "SubmitRecord-Class1.csv"), nrows=500).drop(columns=["index"])
+    # 一行得分越界、一行班级不符，各自的示例都应带上文件内行号
+    records.loc[3, "score"] = -1
+    records.loc[7, "class"] = "Class2"
+    records.to_csv(tmp_path / "SubmitRecord-Class1.csv", index=False)
+
+    report = DataQualityChecker(str(tmp_path)).validate(chunksize=4)
+    checks = report["checks"]
+    assert checks["schema"]["missing_columns"] == {"SubmitRecord-Class1.csv": ["index"]}
+    assert [e["row"] for e in checks["score_range"]["examples"]] == [3]
+    assert [e["row"] for e in checks["class_labels"]["examples"]] == [7]
+    assert "index" not in checks["score_range"]["examples"][0]
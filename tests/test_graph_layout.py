@@ -0,0 +1,79 @@
+import os
+import sys
+
+import numpy as np
+import pytest
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, PROJECT_ROOT)
+
+from ml.graph_layout import GraphLayoutCache, _edge_index, spectral_layout  # noqa: E402
+
+
+def bipartite_graph(prefix, n_titles, n_knowledge, seed=0):
+    """题目 - 知识点二分图，每道题连 1~2 个知识点"""
+    rng = np.random.default_rng(seed)
+    nodes = [{"id": f"{prefix}t{i}"} for i in range(n_titles)] + [{"id": f"{prefix}k{i}"} for i in range(n_knowledge)]
+    edges = [{"source": f"{prefix}t{i}", "target": f"{prefix}k{k}"}
+             for i in range(n_titles) for k in rng.choice(n_knowledge, size=rng.integers(1, 3), replace=False)]
+    # 保证连通
+    edges += [{"source": f"{prefix}t0", "target": f"{prefix}k{k}"} for k in range(n_knowledge)]
+    return nodes, edges
+
+
+def two_components():
+    big_nodes, big_edges = bipartite_graph("a", 400, 20)
+    small_nodes, small_edges = bipartite_graph("b", 30, 5, seed=1)
+    return big_nodes + small_nodes, big_edges + small_edges, len(big_nodes)
+
+
+def test_each_component_is_laid_out_separately():
+    nodes, edges, n_big = two_components()
+    coords, labels = spectral_layout(len(nodes), *_edge_index(nodes, edges))
+    assert len(np.unique(labels)) == 2
+    # 每个分量各自缩放到 [-1, 1]，小分量不会被大分量挤成一个点
+    for part in (coords[:n_big], coords[n_big:]):
+        assert np.abs(part).max() == pytest.approx(1, abs=0.01)
+        assert (part.std(axis=0) > 0.05).all()
+
+
+def test_components_are_packed_without_overlap():
+    nodes, edges, n_big = two_components()
+    positions = GraphLayoutCache("unused").compute(nodes, edges)
+    coords = np.array([positions[node["id"]] for node in nodes])
+    big, small = coords[:n_big], coords[n_big:]
+    overlap = (big.min(axis=0) < small.max(axis=0)) & (small.min(axis=0) < big.max(axis=0))
+    assert not overlap.all()
+    # 节点在画布上分散开，绝大多数不重合
+    cells = {tuple(cell) for cell in np.round(coords / 5).astype(int)}
+    assert len(cells) > 0.8 * len(nodes)
+    assert ((coords >= 0) & (coords <= [1200, 800])).all()
+
+
+def test_cache_key_tracks_graph_and_parameters():
+    nodes, edges = bipartite_graph("a", 50, 5)
+    key = GraphLayoutCache("unused").cache_key(nodes, edges)
+    # 与节点和边的顺序无关
+    assert GraphLayoutCache("unused").cache_key(nodes[::-1], edges[::-1]) == key
+    assert GraphLayoutCache("unused", iterations=100).cache_key(nodes, edges) != key
+    assert GraphLayoutCache("unused", seed=7).cache_key(nodes, edges) != key
+    assert GraphLayoutCache("unused", width=800).cache_key(nodes, edges) != key
+    assert GraphLayoutCache("unused").cache_key(nodes, edges[1:]) != key
+
+
+def test_cached_layout_is_reused_and_pruned(tmp_path, monkeypatch):
+    cache = GraphLayoutCache(str(tmp_path))
+    nodes, edges = bipartite_graph("a", 50, 5)
+    positions = cache.get_or_compute(nodes, edges)
+
+    def fail(*args):
+        raise AssertionError("命中缓存时不应重新计算")
+
+    monkeypatch.setattr(cache, "compute", fail)
+    assert cache.get_or_compute(nodes, edges) == positions
+
+    monkeypatch.undo()
+    monkeypatch.setattr(GraphLayoutCache, "MAX_CACHE_ENTRIES", 2)
+    for seed in range(3):
+        GraphLayoutCache(str(tmp_path), seed=seed + 1, iterations=5).get_or_compute(nodes, edges)
+    assert len(os.listdir(tmp_path)) == 2
@@ -0,0 +1,77 @@
+import os
+import sys
+
+from flask import Flask
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, PROJECT_ROOT)
+
+from ml.profiling import Tracer  # noqa: E402
+from service.metrics import init_metrics, request_metrics  # noqa: E402
+
+CHART_STAGES = {"radar": "ClassRadarVisualizer.visualize", "timeline": "TimelineVisualizer.visualize"}
+
+
+def run(tracer, trace_path, stages, keep_previous):
+    tracer.reset()
+    with tracer.span("generate_visualizations"):
+        for stage in stages:
+            with tracer.span(stage):
+                pass
+    tracer.write_trace(trace_path, keep_previous=keep_previous)
+
+
+def test_partial_run_keeps_other_chart_durations(tmp_path, monkeypatch):
+    # 采集函数注册在进程内共享的 request_metrics 上，不带上 app 注册的那些
+    monkeypatch.setattr(request_metrics, "collectors", [])
+    trace_path = str(tmp_path / "pipeline_trace.json")
+    server = Flask(__name__)
+    init_metrics(server, data_info=lambda: (None, None), trace_path=trace_path,
+                 chart_stages=CHART_STAGES, caches={})
+    client = server.test_client()
+    tracer = Tracer()
+
+    run(tracer, trace_path, CHART_STAGES.values(), keep_previous=False)
+    # 只重新生成时间线
+    run(tracer, trace_path, [CHART_STAGES["timeline"]], keep_previous=True)
+    lines = client.get("/metrics").get_data(as_text=True).splitlines()
+    charts = [line for line in lines if line.startswith("pipeline_chart_duration_seconds{")]
+    assert len(charts) == 2
+
+    # 完整生成时不保留旧的阶段
+    run(tracer, trace_path, [CHART_STAGES["radar"]], keep_previous=False)
+    os.utime(trace_path, (0, 1))
+    lines = client.get("/metrics").get_data(as_text=True).splitlines()
+    charts = [line for line in lines if line.startswith("pipeline_chart_duration_seconds{")]
+    assert charts == [line for line in charts if 'chart="radar"' in line] and len(charts) == 1
+
+
+def test_counters_are_summed_across_workers(tmp_path, monkeypatch):
+    monkeypatch.setattr(request_metrics, "collectors", [])
+    monkeypatch.setenv("PROMETHEUS_MULTIPROC_DIR", str(tmp_path / "metrics"))
+    server = Flask(__name__)
+    init_metrics(server, data_info=lambda: (None, None), trace_path=str(tmp_path / "trace.json"),
+                 chart_stages={}, caches={})
+    server.add_url_rule("/ping", "ping", lambda: "pong")
+    client = server.test_client()
+
+    # 模拟另一个已处理完请求后退出的工作进程
+    child = os.fork()
+    if child == 0:
+        try:
+            request_metrics.worker_started()
+            for _ in range(3):
+                client.get("/ping")
+            request_metrics.flush()
+        finally:
+            os._exit(0)
+    os.waitpid(child, 0)
+
+    client.get("/ping")
+    client.get("/ping")
+    lines = client.get("/metrics").get_data(as_text=True).splitlines()
+    assert 'http_requests_total{method="GET",route="/ping",status="200"} 5' in lines
+    # 进程级指标只列出存活的进程
+    rss = [line for line in lines if line.startswith("process_resident_memory_bytes{")]
+    assert rss and all(f'pid="{child}"' not in line for line in rss)
+    assert any(f'pid="{os.getpid()}"' in line for line in rss)
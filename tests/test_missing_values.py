@@ -0,0 +1,80 @@
+import os
+import sys
+import json
+import shutil
+
+import numpy as np
+import pandas as pd
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, PROJECT_ROOT)
+
+from ml.columnar_store import ColumnarStore, open_submission_store  # noqa: E402
+from ml.partitions import PartitionedDataset, UNKNOWN_PERIOD  # noqa: E402
+from ml.radar_query import GroupRadarQuery  # noqa: E402
+from ml.sketches import StreamingStats  # noqa: E402
+from ml.student_index import StudentIndex  # noqa: E402
+
+DATA_DIR = os.path.join(PROJECT_ROOT, "data")
+
+
+def make_data(tmp_path):
+    for name in ("Data_StudentInfo.csv", "Data_TitleInfo.csv"):
+        shutil.copy(os.path.join(DATA_DIR, name), tmp_path / name)
+    records = pd.read_csv(os.path.join(DATA_DIR, "SubmitRecord-Class1.csv"), nrows=2000)
+    records["score"] = records["score"].astype(object)
+    records.loc[[0, 1], "score"] = ["", "-"]
+    records.loc[2, "memory"] = np.nan
+    records.loc[[3, 4], "time"] = np.nan
+    records.to_csv(tmp_path / "SubmitRecord-Class1.csv", index=False)
+    return records
+
+
+def test_missing_numbers_stay_nan(tmp_path):
+    make_data(tmp_path)
+    store = open_submission_store(str(tmp_path)).snapshot()
+    assert np.isnan(store["score"]).sum() == 2
+    assert np.isnan(store["memory"]).sum() == 1
+    assert np.isnan(store["time"]).sum() == 2
+
+
+def test_integer_column_with_missing_values_fails_the_build(tmp_path):
+    df = pd.DataFrame({"score": [1, None, 3]})
+    store = ColumnarStore(str(tmp_path / "store"))
+    try:
+        store.write(df, columns=[("score", "int16")])
+    except ValueError as e:
+        assert "score" in str(e)
+    else:
+        raise AssertionError("缺失值不应被写成 0")
+    assert not store.exists()
+
+
+def test_missing_time_gets_its_own_partition(tmp_path):
+    make_data(tmp_path)
+    view = PartitionedDataset(str(tmp_path)).current()
+    periods = {part["period"] for part in view.manifest["partitions"]}
+    assert UNKNOWN_PERIOD in periods and not any(p.startswith("1970") for p in periods)
+    assert len(view.read(["time"])) == 2000
+    # 按时间范围的查询不会命中时间缺失的记录
+    assert not np.isnan(view.read(["time"], start="2000-01-01")["time"]).any()
+
+    stats = StreamingStats(dimensions=("day",)).build(PartitionedDataset(str(tmp_path)))
+    assert stats.table("day").summary([UNKNOWN_PERIOD])[0]["rows"] == 2
+
+
+def test_queries_skip_missing_values(tmp_path):
+    records = make_data(tmp_path)
+    result = GroupRadarQuery(str(tmp_path)).compare("class")
+    raw = result["groups"][0]["raw"]
+    assert raw["total_submissions"] == 2000
+    assert raw["avg_score"] == pd.to_numeric(records["score"], errors="coerce").mean()
+
+
+def test_student_index_is_built_from_the_store(tmp_path):
+    records = make_data(tmp_path)
+    # 索引取自列式存储：非数值的得分（"-"）同样为缺失，而不是字符串
+    detail = StudentIndex(str(tmp_path)).student_detail(records.loc[1, "student_ID"])
+    json.dumps(detail, allow_nan=False)
+    assert any(item["score"] is None for item in detail["history"])
+    assert detail["submissions"] == int((records["student_ID"] == records.loc[1, "student_ID"]).sum())
@@ -0,0 +1,26 @@
+import os
+import sys
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, PROJECT_ROOT)
+
+from ml.profiling import tracer, trace_span, trace_stage  # noqa: E402
+
+
+class Stage:
+    @trace_stage()
+    def run(self):
+        return [1, 2, 3]
+
+
+def test_stages_are_recorded_only_inside_a_trace():
+    tracer.reset()
+    for _ in range(5):
+        Stage().run()
+    assert tracer.summary() == []
+
+    with trace_span("generate_visualizations"):
+        Stage().run()
+    assert [(s["name"], s["rows_out"]) for s in tracer.summary()] == [("Stage.run", 3),
+                                                                      ("generate_visualizations", None)]
+    tracer.reset()
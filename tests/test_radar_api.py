@@ -0,0 +1,64 @@
+import os
+import sys
+
+import pytest
+from dash import html
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, PROJECT_ROOT)
+
+import app  # noqa: E402
+
+
+@pytest.fixture(scope="module")
+def client():
+    # Dash 在首个请求前校验布局，测试不依赖生成的图表页面
+    app.dash_app.layout = html.Div()
+    return app.server.test_client()
+
+
+@pytest.mark.parametrize("url", [
+    "/api/radar?group_by=students&groups=a,b",
+    "/api/radar?group_by=unknown",
+    "/api/radar?start=garbage",
+])
+def test_get_rejects_malformed_params(client, url):
+    response = client.get(url)
+    assert response.status_code == 400
+    assert "error" in response.get_json()
+
+
+@pytest.mark.parametrize("body", [
+    ["a"],
+    "students",
+    42,
+    {"group_by": "students", "groups": ["a"]},
+    {"group_by": "students", "groups": {"A": "abc"}},
+    {"group_by": "students", "groups": {"A": [1, 2]}},
+    {"group_by": "students", "groups": {}},
+    {"group_by": "class", "groups": "Class1"},
+    {"group_by": "class", "groups": [1, 2]},
+    {"group_by": "class", "groups": {"Class1": []}},
+    {"group_by": "class", "start": {"year": 2024}},
+])
+def test_post_rejects_malformed_body(client, body):
+    response = client.post("/api/radar", json=body)
+    assert response.status_code == 400
+    assert "error" in response.get_json()
+
+
+def test_post_rejects_non_json_body(client):
+    response = client.post("/api/radar", data="not json", content_type="application/json")
+    assert response.status_code == 400
+
+
+def test_valid_queries(client):
+    response = client.get("/api/radar?group_by=class&groups=Class1,Class2")
+    assert response.status_code == 200
+    assert [g["name"] for g in response.get_json()["groups"]] == ["Class1", "Class2"]
+
+    student_id = app.radar_query.student.index[0]
+    response = client.post("/api/radar", json={"group_by": "students", "groups": {"A": [student_id]}})
+    assert response.status_code == 200
+    groups = response.get_json()["groups"]
+    assert [g["name"] for g in groups] == ["A"] and groups[0]["unique_students"] == 1
@@ -0,0 +1,76 @@
+import os
+import sys
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from dash import html
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, PROJECT_ROOT)
+
+import app  # noqa: E402
+from ml.reloadable import Reloadable  # noqa: E402
+
+
+def test_stale_value_is_rebuilt_once_and_never_none():
+    loads = []
+
+    def load():
+        loads.append(1)
+        time.sleep(0.05)
+        return object()
+
+    value = Reloadable(load)
+    first = value.get()
+    value.mark_stale()
+    with ThreadPoolExecutor(8) as pool:
+        results = list(pool.map(lambda _: value.get(), range(8)))
+    # 只重建一次；重建期间到达的查询可能仍拿到旧结果，但不会拿到 None
+    assert len(loads) == 2
+    assert all(r is not None for r in results)
+    assert value.get() is not first
+
+
+def test_failed_reload_stays_stale():
+    calls = []
+
+    def load():
+        calls.append(1)
+        if len(calls) == 2:
+            raise OSError("rebuild failed")
+        return len(calls)
+
+    value = Reloadable(load)
+    assert value.get() == 1
+    value.mark_stale()
+    with pytest.raises(OSError):
+        value.get()
+    assert value.value == 1
+    assert value.get() == 3
+
+
+def test_queries_survive_concurrent_invalidation():
+    app.dash_app.layout = html.Div()
+    app.warm_up()
+    client = app.server.test_client()
+    student_id = app.radar_query.student.index[0]
+    urls = ["/api/radar?group_by=major", "/api/radar?group_by=class&start=2023-10-01",
+            "/api/timeline?classes=Class1", f"/api/students/{student_id}", "/api/stats/class"]
+    stop = threading.Event()
+
+    def invalidate():
+        while not stop.is_set():
+            app.response_cache.invalidate()
+            time.sleep(0.01)
+
+    invalidator = threading.Thread(target=invalidate)
+    invalidator.start()
+    try:
+        with ThreadPoolExecutor(4) as pool:
+            statuses = list(pool.map(lambda i: client.get(urls[i % len(urls)]).status_code, range(40)))
+    finally:
+        stop.set()
+        invalidator.join()
+    assert statuses == [200] * 40
@@ -0,0 +1,56 @@
+import os
+import sys
+
+import numpy as np
+import pytest
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, PROJECT_ROOT)
+
+from ml.columnar_store import load_submit_frame  # noqa: E402
+from ml.partitions import PartitionedDataset  # noqa: E402
+from ml.sketches import HLL_PRECISION, HyperLogLog, QuantileSketch, StreamingStats  # noqa: E402
+
+DATA_DIR = os.path.join(PROJECT_ROOT, "data")
+# 标准误差 1.04 / sqrt(2^precision) 的三倍
+HLL_TOLERANCE = 3 * 1.04 / np.sqrt(1 << HLL_PRECISION)
+
+
+@pytest.fixture(scope="module")
+def submit_df():
+    return load_submit_frame(DATA_DIR)
+
+
+def test_hll_estimates_distinct_count():
+    estimate = HyperLogLog().add([f"student-{i}" for i in range(100_000)]).count()
+    assert abs(estimate / 100_000 - 1) < HLL_TOLERANCE
+
+
+def test_hll_distinct_students_per_class(submit_df):
+    estimates = StreamingStats(dimensions=("class",), metrics=()).update(submit_df).distinct_students("class")
+    exact = submit_df.groupby("class")["student_ID"].nunique()
+    errors = [abs(estimates[name] / count - 1) for name, count in exact.items()]
+    assert max(errors) < HLL_TOLERANCE
+
+
+def test_quantiles_within_relative_accuracy():
+    values = np.random.default_rng(0).lognormal(8, 1.5, 200_000).round()
+    sketch = QuantileSketch().add(values)
+    for q in (0.5, 0.95, 0.99, 0.999):
+        exact = np.quantile(values, q, method="lower")
+        assert abs(sketch.quantile(q) / exact - 1) <= sketch.relative_accuracy
+
+
+def test_merged_split_equals_single_pass(submit_df):
+    single = StreamingStats().update(submit_df)
+    half = len(submit_df) // 2
+    merged = StreamingStats().update(submit_df.iloc[:half]).merge(StreamingStats().update(submit_df.iloc[half:]))
+    # 逐分区读取后累加的结果与一次性更新相同
+    built = StreamingStats().build(PartitionedDataset(DATA_DIR))
+    for stats in (merged, built):
+        assert stats.rows == single.rows
+        for dimension in single.tables:
+            expected = {g["key"]: g for g in single.summary(dimension)["groups"]}
+            actual = {g["key"]: g for g in stats.summary(dimension)["groups"]}
+            assert actual == expected
+            assert stats.summary(dimension)["total"] == single.summary(dimension)["total"]
@@ -0,0 +1,265 @@
+"""可视化流程的规模基准测试：在不同规模的模拟数据上逐阶段统计耗时与内存峰值
+
+用法：
+    python tools/benchmark.py --rows 100000 1000000 --output benchmark.json
+    python tools/benchmark.py --rows 1000000 --charts radar timeline --compare benchmark_old.json
+
+模拟数据由 ml.synthetic 生成并缓存在 --data-root 下，相同规模和随机种子会直接复用。
+"""
+import os
+import sys
+import gc
+import json
+import time
+import shutil
+import argparse
+import platform
+import resource
+import tempfile
+import subprocess
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+import pandas as pd
+from ml.synthetic import SyntheticDataGenerator
+
+
+def store_stages(data_path, out_dir):
+    from ml.columnar_store import open_submission_store
+    state = {}
+    # 每个规模最先运行：各图表的 load_data 之后只打开已写好的存储，不再把写入耗时计入自己的阶段
+    return [
+        ("build_store", lambda: state.update(store=open_submission_store(data_path)), lambda: len(state["store"])),
+    ]
+
+
+def heatmap_stages(data_path, out_dir):
+    from ml.knowledge_heatmap import DataVisualizer
+    viz = DataVisualizer(pd.read_csv(os.path.join(data_path, "Data_StudentInfo.csv")),
+                         pd.read_csv(os.path.join(data_path, "Data_TitleInfo.csv")),
+                         pd.DataFrame(), data_path)
+    state = {}
+    return [
+        ("load_data", viz.load_data, lambda: len(viz.submit_df)),
+        ("clean_data", viz.clean_data, lambda: len(viz.submit_df)),
+        ("merge_data", viz.merge_data, lambda: len(viz.merged)),
+        ("extract_knowledge_hierarchy", viz.extract_knowledge_hierarchy, lambda: len(viz.merged)),
+        ("filter_invalid_data", viz.filter_invalid_data, lambda: len(viz.merged)),
+        ("aggregate_data", lambda: state.update(agg=viz.aggregate_data()), lambda: len(state["agg"])),
+        ("generate_heatmap", lambda: viz.generate_heatmap(state["agg"], os.path.join(out_dir, "heatmap.html")), None),
+    ]
+
+
+def radar_stages(data_path, out_dir):
+    from ml.radar_chart import ClassRadarVisualizer
+    viz = ClassRadarVisualizer(data_path)
+    return [
+        ("load_data", viz.load_data, lambda: len(viz.submit_df)),
+        ("preprocess_data", viz.preprocess_data, lambda: len(viz.submit_df)),
+        ("aggregate_data", viz.aggregate_data, lambda: len(viz.grouped_class)),
+        ("normalize_data", viz.normalize_data, lambda: len(viz.grouped_class)),
+        ("create_radar_chart", lambda: viz.create_radar_chart(os.path.join(out_dir, "radar.html")), None),
+    ]
+
+
+def clusters_stages(data_path, out_dir):
+    from ml._3d_scatter import StudentBehaviorClusterVisualizer
+    viz = StudentBehaviorClusterVisualizer(data_path)
+    state = {}
+    return [
+        ("load_data", viz.load_data, lambda: len(viz.submit_df)),
+        ("preprocess_data", viz.preprocess_data, lambda: len(viz.submit_df)),
+        ("aggregate_features", viz.aggregate_features, lambda: len(viz.features)),
+        ("standardize_features", viz.standardize_features, None),
+        ("perform_clustering", viz.perform_clustering, None),
+        ("prepare_3d_data", lambda: state.update(data_3d=viz.prepare_3d_data()), lambda: len(state["data_3d"])),
+        ("create_3d_scatter", lambda: viz.create_3d_scatter(state["data_3d"], os.path.join(out_dir, "clusters.html")),
+         None),
+    ]
+
+
+def xgboost_stages(data_path, out_dir):
+    from ml.Xgboost import XGBoostModelVisualizer
+    viz = XGBoostModelVisualizer(data_path)
+    stages = [
+        ("load_data", viz.load_data, lambda: len(viz.submit_df)),
+        ("preprocess_data", viz.preprocess_data, lambda: len(viz.submit_df)),
+        ("aggregate_features", viz.aggregate_features, lambda: len(viz.features)),
+        ("train_model", viz.train_model, None),
+        ("visualize_feature_importance", viz.visualize_feature_importance, None),
+    ]
+    # 决策树图依赖 graphviz 的 dot 命令，未安装时跳过
+    if shutil.which("dot"):
+        stages.append(("visualize_tree", lambda: viz.visualize_tree(os.path.join(out_dir, "xgb_tree")), None))
+    return stages
+
+
+def network_stages(data_path, out_dir):
+    from ml.network import NetworkGraphVisualizer
+    # 使用空的布局缓存目录，统计的是首次计算布局的耗时
+    viz = NetworkGraphVisualizer(data_path, layout_cache_dir=os.path.join(out_dir, "layout"))
+    return [
+        ("load_data", viz.load_data, lambda: len(viz.df_submit)),
+        ("calculate_submission_counts", viz.calculate_submission_counts, None),
+        ("construct_nodes_and_edges", viz.construct_nodes_and_edges, lambda: len(viz.nodes)),
+        ("compute_layout", viz.compute_layout, lambda: len(viz.nodes)),
+        ("create_network_graph", lambda: viz.create_network_graph(os.path.join(out_dir, "network.html")), None),
+    ]
+
+
+def timeline_stages(data_path, out_dir):
+    from ml.timeline import TimelineVisualizer
+    viz = TimelineVisualizer(data_path)
+    return [
+        ("load_data", viz.load_data, lambda: len(viz.submit_df)),
+        ("preprocess_data", viz.preprocess_data, lambda: len(viz.submit_df)),
+        ("generate_timeline", lambda: viz.generate_timeline(os.path.join(out_dir, "timeline.html")), None),
+    ]
+
+
+def radar_query_stages(data_path, out_dir):
+    from ml.radar_query import GroupRadarQuery
+    query = GroupRadarQuery(data_path)
+    # 列式存储已由 store 阶段写好，build 阶段直接复用
+    return [
+        ("build", query.build, None),
+        ("compare", lambda: query.compare("class", None), None),
+    ]
+
+
+def data_quality_stages(data_path, out_dir):
+    from ml.Dataquality import DataQualityChecker
+    checker = DataQualityChecker(data_path)
+    return [
+        ("validate", lambda: checker.validate(report_path=os.path.join(out_dir, "data_quality.json")), None),
+    ]
+
+
+# 图表名称 -> 返回 [(阶段名, 执行函数, 输出行数函数)] 的构造函数
+BENCHMARKS = {
+    "store": store_stages,
+    "heatmap": heatmap_stages,
+    "radar": radar_stages,
+    "clusters": clusters_stages,
+    "xgboost": xgboost_stages,
+    "network": network_stages,
+    "timeline": timeline_stages,
+    "radar_query": radar_query_stages,
+    "data_quality": data_quality_stages,
+}
+
+
+def run_stage(func, rows_func, trace_memory):
+    """执行一个阶段，返回耗时、CPU 时间、内存峰值与输出行数"""
+    gc.collect()
+    if trace_memory:
+        tracemalloc.start()
+    cpu_start = time.process_time()
+    start = time.perf_counter()
+    func()
+    wall = time.perf_counter() - start
+    cpu = time.process_time() - cpu_start
+    peak = None
+    if trace_memory:
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+    return {
+        "wall_sec": round(wall, 4),
+        "cpu_sec": round(cpu, 4),
+        "peak_mb": round(peak / 1024 / 1024, 2) if peak is not None else None,
+        "rows_out": rows_func() if rows_func else None,
+    }
+
+
+def run_benchmark(chart, data_path, rows, trace_memory):
+    results = []
+    with tempfile.TemporaryDirectory() as out_dir:
+        for stage, func, rows_func in BENCHMARKS[chart](data_path, out_dir):
+            result = run_stage(func, rows_func, trace_memory)
+            result.update(chart=chart, stage=stage, rows=rows)
+            results.append(result)
+            print(f"  {chart:<12} {stage:<30} {result['wall_sec']:>9.3f}s"
+                  + (f" {result['peak_mb']:>9.1f} MB" if result["peak_mb"] is not None else ""))
+    return results
+
+
+def environment_info():
+    try:
+        revision = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                                  cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip() or None
+    except OSError:
+        revision = None
+    return {
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "git_revision": revision,
+        "python": platform.python_version(),
+        "pandas": pd.__version__,
+        "numpy": np.__version__,
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+    }
+
+
+def compare(results, baseline_path, threshold):
+    """与基线结果逐阶段比较耗时，列出变慢超过阈值的阶段"""
+    with open(baseline_path, encoding="utf-8") as f:
+        baseline = {(r["chart"], r["stage"], r["rows"]): r for r in json.load(f)["results"]}
+    regressions = []
+    for r in results:
+        old = baseline.get((r["chart"], r["stage"], r["rows"]))
+        if old is None or not old["wall_sec"]:
+            continue
+        change = r["wall_sec"] / old["wall_sec"] - 1
+        if change > threshold:
+            regressions.append((r, old, change))
+            print(f"变慢: {r['chart']}.{r['stage']} @ {r['rows']} 行  "
+                  f"{old['wall_sec']:.3f}s -> {r['wall_sec']:.3f}s (+{change:.0%})")
+    if not regressions:
+        print("未发现超过阈值的性能退化")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="可视化流程规模基准测试")
+    parser.add_argument("--rows", type=int, nargs="+", default=[100_000, 1_000_000], help="提交记录规模（可多个）")
+    parser.add_argument("--charts", nargs="+", choices=list(BENCHMARKS), default=list(BENCHMARKS))
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--data-root", default=os.path.join(tempfile.gettempdir(), "edudata-bench"),
+                        help="模拟数据缓存目录")
+    parser.add_argument("--output", default="benchmark.json", help="结果 JSON 文件")
+    parser.add_argument("--no-memory", action="store_true", help="不统计内存峰值（tracemalloc 会拖慢字符串密集的阶段）")
+    parser.add_argument("--compare", help="用于比较的基线结果 JSON")
+    parser.add_argument("--threshold", type=float, default=0.2, help="判定为退化的耗时增幅")
+    args = parser.parse_args()
+
+    results = []
+    for rows in args.rows:
+        data_path = os.path.join(args.data_root, f"rows{rows}-seed{args.seed}")
+        if not os.path.exists(os.path.join(data_path, "Data_TitleInfo.csv")):
+            print(f"生成模拟数据: {rows} 行 -> {data_path}")
+            SyntheticDataGenerator(data_path, n_rows=rows, seed=args.seed).generate()
+        # 每个规模使用独立的派生数据缓存（列式存储、布局缓存等）
+        shutil.rmtree(os.path.join(data_path, "cache"), ignore_errors=True)
+        print(f"规模: {rows} 行")
+        # 共享的列式存储作为单独的一项最先构建
+        for chart in ["store"] + [c for c in args.charts if c != "store"]:
+            results.extend(run_benchmark(chart, data_path, rows, not args.no_memory))
+
+    report = {
+        "environment": environment_info(),
+        "config": {"rows": args.rows, "seed": args.seed, "trace_memory": not args.no_memory},
+        "max_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+        "results": results,
+    }
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print(f"结果已保存到: {args.output}")
+
+    if args.compare:
+        sys.exit(1 if compare(results, args.compare, args.threshold) else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+"""导入耗时基准：在全新的解释器中测量各入口的导入时间及加载的重量级依赖
+
+用法：
+    python tools/import_benchmark.py --repeat 5
+
+"eager" 一项模拟改为按需导入之前 ml/__init__.py 的行为（一次导入全部六个可视化模块），作为对照。
+当时 Xgboost.py 还在模块顶层导入 graphviz 和 matplotlib.pyplot，后来删除了这两个未使用的导入，
+因此对照项会额外导入它们，与改动前的导入集合一致；"eager (current modules)" 为不含它们的当前模块，
+两项之差即删除这两个导入带来的收益。
+"dash" 一项为框架本身的导入，dash 自身会导入 plotly 的核心模块，因此 "app (serving)" 中的 plotly 来自 dash，
+而不是各可视化模块。
+"""
+import os
+import sys
+import json
+import argparse
+import statistics
+import subprocess
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# 名称 -> 导入语句
+EAGER_IMPORTS = "import ml.knowledge_heatmap, ml.radar_chart, ml.Xgboost, ml.network, ml._3d_scatter, ml.timeline"
+# 改动前 Xgboost.py 顶层的导入，已随按需导入一起删除
+REMOVED_IMPORTS = "import graphviz, matplotlib.pyplot"
+
+TARGETS = {
+    "eager (pre-change)": f"{REMOVED_IMPORTS}; {EAGER_IMPORTS}",
+    "eager (current modules)": EAGER_IMPORTS,
+    "ml": "import ml",
+    "ml.registry": "import ml.registry",
+    "single chart (radar)": "from ml.registry import get_visualizer; get_visualizer('radar')",
+    "dash": "import dash",
+    "app (serving)": "import app",
+}
+
+HEAVY_MODULES = ["xgboost", "sklearn", "scipy", "matplotlib", "graphviz", "plotly", "plotly.express",
+                 "pyecharts", "dash"]
+
+PROBE = """
+import sys, time, json
+start = time.perf_counter()
+{statement}
+elapsed = time.perf_counter() - start
+print(json.dumps({{"seconds": elapsed, "modules": len(sys.modules),
+                  "heavy": [m for m in {heavy!r} if m in sys.modules]}}))
+"""
+
+
+def measure(statement, repeat):
+    runs = []
+    for _ in range(repeat):
+        output = subprocess.run([sys.executable, "-c", PROBE.format(statement=statement, heavy=HEAVY_MODULES)],
+                                cwd=PROJECT_ROOT, capture_output=True, text=True, check=True).stdout
+        runs.append(json.loads(output.strip().splitlines()[-1]))
+    return {
+        "median_sec": round(statistics.median(r["seconds"] for r in runs), 4),
+        "min_sec": round(min(r["seconds"] for r in runs), 4),
+        "modules": runs[-1]["modules"],
+        "heavy": runs[-1]["heavy"],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="测量各入口的导入耗时")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--output", help="结果 JSON 文件")
+    args = parser.parse_args()
+
+    results = {}
+    for name, statement in TARGETS.items():
+        results[name] = measure(statement, args.repeat)
+        r = results[name]
+        print(f"{name:<26} {r['median_sec']:>8.3f}s (min {r['min_sec']:.3f}s)  模块数 {r['modules']:>5}  "
+              f"{', '.join(r['heavy']) or '-'}")
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,53 @@
+"""简单的并发压测脚本，统计每秒请求数和延迟分位数
+
+用法：
+    python tools/loadtest.py --url http://127.0.0.1:8000/api/radar --concurrency 32 --requests 2000
+"""
+import time
+import argparse
+import statistics
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+
+def fetch(url, timeout):
+    """发起一次请求，返回 (状态码, 耗时秒, 响应字节数)"""
+    start = time.perf_counter()
+    try:
+        with urllib.request.urlopen(url, timeout=timeout) as resp:
+            body = resp.read()
+            status = resp.status
+    except Exception:
+        return None, time.perf_counter() - start, 0
+    return status, time.perf_counter() - start, len(body)
+
+
+def run(urls, concurrency, total, timeout):
+    targets = [urls[i % len(urls)] for i in range(total)]
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        results = list(pool.map(lambda u: fetch(u, timeout), targets))
+    elapsed = time.perf_counter() - start
+
+    latencies = sorted(r[1] for r in results)
+    failures = sum(1 for r in results if r[0] is None or r[0] >= 400)
+    quantiles = statistics.quantiles(latencies, n=100) if len(latencies) > 1 else latencies * 99
+    print(f"请求数: {total}  并发: {concurrency}  失败: {failures}")
+    print(f"总耗时: {elapsed:.2f}s  吞吐量: {total / elapsed:.1f} req/s  "
+          f"传输: {sum(r[2] for r in results) / 1024 / 1024:.1f} MB")
+    print(f"延迟 p50: {quantiles[49] * 1000:.1f}ms  p95: {quantiles[94] * 1000:.1f}ms  "
+          f"p99: {quantiles[98] * 1000:.1f}ms  max: {latencies[-1] * 1000:.1f}ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="可视化大屏压测")
+    parser.add_argument("--url", action="append", required=True, help="压测地址，可重复指定")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--requests", type=int, default=1000)
+    parser.add_argument("--timeout", type=float, default=30)
+    args = parser.parse_args()
+    run(args.url, args.concurrency, args.requests, args.timeout)
+
+
+if __name__ == "__main__":
+    main()